@@ -0,0 +1,88 @@
+import json
+import multiprocessing
+import time
+
+import degrees
+
+# Number of pairs handed to a worker process at a time
+CHUNKSIZE = 64
+
+
+def run(lines, output, directory, workers=None, rebuild_cache=False):
+    """
+    Loads `directory`, then answers every tab-separated (source, target)
+    pair in `lines`, writing one JSON object per pair to `output` in
+    input order.
+
+    Queries are spread across `workers` processes. Where fork is
+    available the workers share the graph loaded by this process;
+    otherwise each worker loads `directory` itself.
+    """
+    degrees.load_data(directory, rebuild_cache=rebuild_cache)
+
+    pairs = (parse(line) for line in lines if line.strip())
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        initializer, initargs = None, ()
+    else:
+        context = multiprocessing.get_context()
+        initializer, initargs = degrees.load_data, (directory,)
+
+    with context.Pool(workers, initializer, initargs) as pool:
+        for result in pool.imap(query, pairs, chunksize=CHUNKSIZE):
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+
+
+def parse(line):
+    """
+    Splits an input line into its source and target fields.
+    """
+    fields = line.rstrip("\n").split("\t")
+    if len(fields) != 2:
+        return line.strip(), None
+    return fields[0].strip(), fields[1].strip()
+
+
+def query(pair):
+    """
+    Returns the JSON-serializable result for one (source, target) pair.
+    """
+    source, target = pair
+    result = {"source": source, "target": target}
+    if target is None:
+        result["error"] = "expected a tab-separated source and target"
+        return result
+
+    try:
+        source_id = resolve(source)
+        target_id = resolve(target)
+    except LookupError as e:
+        result["error"] = str(e)
+        return result
+
+    start = time.perf_counter()
+    path = degrees.shortest_path(source_id, target_id)
+    latency = time.perf_counter() - start
+
+    result["source_id"] = source_id
+    result["target_id"] = target_id
+    result["degrees"] = None if path is None else len(path)
+    result["path"] = path
+    result["latency_ms"] = round(latency * 1000, 3)
+    return result
+
+
+def resolve(field):
+    """
+    Returns the person_id for a field holding either an IMDB id
+    or an unambiguous name.
+    """
+    if field in degrees.people:
+        return field
+    person_ids = degrees.names.get(field.lower(), set())
+    if len(person_ids) == 0:
+        raise LookupError(f"person not found: {field}")
+    if len(person_ids) > 1:
+        raise LookupError(f"ambiguous name: {field}")
+    return next(iter(person_ids))
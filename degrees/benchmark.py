@@ -0,0 +1,212 @@
+import argparse
+import json
+import platform
+import random
+import resource
+import statistics
+import sys
+import time
+
+import degrees
+from util import Node, QueueFrontier
+
+# Number of highest-degree people used as hubs
+HUBS = 5
+
+# Number of times each query is repeated
+REPEAT = 3
+
+# Number of random pairs timed by default
+PAIRS = 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark loading and searching a degrees dataset."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--pairs", type=int, default=PAIRS,
+                        help="number of random pairs to time")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", action="store_true",
+                        help="also time the original frontier search")
+    parser.add_argument("--json", metavar="FILE",
+                        help="write the results to FILE as JSON")
+    args = parser.parse_args()
+
+    results = {
+        "directory": args.directory,
+        "python": platform.python_version(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+    print("Loading data...")
+    results["load_csv_s"] = timed_load(args.directory, rebuild_cache=True)
+    results["load_snapshot_s"] = timed_load(args.directory)
+    print("Data loaded.")
+    results["people"] = len(degrees.people)
+    results["movies"] = len(degrees.movies)
+    results["stars"] = len(degrees.graph.person_movies)
+    results["landmarks"] = degrees.landmarks is not None
+
+    rng = random.Random(args.seed)
+    person_ids = list(degrees.people)
+    pairs = [
+        (rng.choice(person_ids), rng.choice(person_ids))
+        for _ in range(args.pairs)
+    ]
+    results["random"] = latencies(pairs)
+
+    hubs = [
+        degrees.graph.person_ids[person]
+        for person in sorted(
+            range(len(degrees.graph.person_ids)),
+            key=degrees.graph.degree, reverse=True
+        )[:HUBS]
+    ]
+    queries = {
+        "hub-to-hub": [
+            (source, target)
+            for source in hubs for target in hubs if source != target
+        ],
+        "disconnected": disconnected_pairs(hubs)
+    }
+    for kind, kind_pairs in queries.items():
+        results[kind] = latencies(kind_pairs)
+        if args.baseline and kind_pairs:
+            baseline = timed(frontier_shortest_path, kind_pairs)
+            results[kind]["baseline_total_ms"] = round(baseline * 1000, 3)
+
+    # Linux reports kilobytes, macOS bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1024 ** 2 if sys.platform == "darwin" else 1024
+    results["peak_rss_mb"] = round(peak / scale, 1)
+
+    report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def timed_load(directory, rebuild_cache=False):
+    """
+    Returns the seconds taken to load `directory` from scratch.
+    """
+    start = time.perf_counter()
+    degrees.load_data(directory, rebuild_cache=rebuild_cache)
+    return round(time.perf_counter() - start, 4)
+
+
+def latencies(pairs):
+    """
+    Returns latency statistics, in milliseconds, of running
+    degrees.shortest_path once over each pair.
+    """
+    if not pairs:
+        return {"pairs": 0}
+    times = []
+    connected = 0
+    for source, target in pairs:
+        start = time.perf_counter()
+        path = degrees.shortest_path(source, target)
+        times.append((time.perf_counter() - start) * 1000)
+        connected += path is not None
+    times.sort()
+    return {
+        "pairs": len(pairs),
+        "connected": connected,
+        "mean_ms": round(statistics.fmean(times), 4),
+        "p50_ms": round(percentile(times, 50), 4),
+        "p90_ms": round(percentile(times, 90), 4),
+        "p99_ms": round(percentile(times, 99), 4),
+        "max_ms": round(times[-1], 4)
+    }
+
+
+def percentile(values, q):
+    """
+    Returns the q-th percentile of sorted `values`, by nearest rank.
+    """
+    rank = max(0, min(len(values) - 1, round(q / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def report(results):
+    """
+    Prints a short human-readable summary of `results`.
+    """
+    print(f"{results['people']} people, {results['movies']} movies, "
+          f"{results['stars']} stars")
+    print(f"load_data: {results['load_csv_s']:.3f} s from CSV, "
+          f"{results['load_snapshot_s']:.3f} s from snapshot")
+    print(f"peak RSS: {results['peak_rss_mb']} MB")
+    for kind in ["random", "hub-to-hub", "disconnected"]:
+        stats = results[kind]
+        if not stats["pairs"]:
+            print(f"{kind}: no pairs in this dataset")
+            continue
+        print(f"{kind} ({stats['pairs']} pairs, {stats['connected']} "
+              f"connected): p50 {stats['p50_ms']:.3f} ms, "
+              f"p90 {stats['p90_ms']:.3f} ms, p99 {stats['p99_ms']:.3f} ms")
+        if "baseline_total_ms" in stats:
+            print(f"  frontier BFS baseline: "
+                  f"{stats['baseline_total_ms']:.2f} ms total")
+
+
+def disconnected_pairs(hubs):
+    """
+    Returns (hub, person_id) pairs where the person cannot be
+    reached from the hub, one per hub.
+    """
+    graph = degrees.graph
+    pairs = []
+    for hub in hubs:
+        component = graph.components[graph.person_index[hub]]
+        for person, other in enumerate(graph.components):
+            if other != component:
+                pairs.append((hub, graph.person_ids[person]))
+                break
+    return pairs
+
+
+def timed(search, pairs):
+    """
+    Returns the best total time, in seconds, of running `search`
+    over all `pairs`, out of REPEAT runs.
+    """
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for source, target in pairs:
+            search(source, target)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def frontier_shortest_path(source, target):
+    """
+    The original single-ended search over util.QueueFrontier,
+    kept as the baseline the benchmark compares against.
+    """
+    explored = set()
+    frontier = QueueFrontier()
+    frontier.add(Node(state=source, parent=None, action=None))
+
+    while not frontier.empty():
+        node = frontier.remove()
+        explored.add(node.state)
+        for movie, actor in degrees.neighbors_for_person(node.state):
+            if not (actor in explored or frontier.contains_state(actor)):
+                child = Node(state=actor, parent=node, action=movie)
+                if child.state == target:
+                    pairs = []
+                    while child.parent:
+                        pairs = [(child.action, child.state)] + pairs
+                        child = child.parent
+                    return pairs
+                frontier.add(child)
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import json
+import mmap
+import os
+
+from array import array
+
+# Directory, inside the data directory, where snapshots are written
+CACHE_DIR = ".degrees-cache"
+
+# Bump whenever the snapshot layout changes
+VERSION = 6
+
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+
+def fingerprint(directory):
+    """
+    Returns the size and modification time of each source CSV file.
+    """
+    sources = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        sources[filename] = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+    return sources
+
+
+def save(directory, parts):
+    """
+    Writes a snapshot of `parts`, a dict of flat buffers by name: the
+    arrays and string columns of everything degrees.load_data loads.
+
+    Both files are written beside their final names and moved into
+    place, so processes that mapped an older snapshot keep reading it
+    unchanged.
+    """
+    path = os.path.join(directory, CACHE_DIR)
+    os.makedirs(path, exist_ok=True)
+
+    layout = []
+
+    def write_arrays(f):
+        offset = 0
+        for name, values in parts.items():
+            view = memoryview(values)
+            raw = view.cast("B")
+            layout.append({
+                "name": name,
+                "typecode": view.format,
+                "offset": offset,
+                "length": len(view)
+            })
+            # Pad every array to an 8-byte boundary so views stay aligned
+            padding = -len(raw) % 8
+            f.write(raw)
+            f.write(bytes(padding))
+            offset += len(raw) + padding
+
+    inode = replace(os.path.join(path, "arrays.bin"), "wb", write_arrays)
+
+    # Written last, so a snapshot interrupted halfway is never valid
+    manifest = {
+        "version": VERSION,
+        "sources": fingerprint(directory),
+        "inode": inode,
+        "arrays": layout
+    }
+    replace(os.path.join(path, "manifest.json"), "w",
+            lambda f: json.dump(manifest, f))
+
+
+def replace(path, mode, write):
+    """
+    Calls `write` on a temporary file opened with `mode` next to
+    `path`, then atomically renames it to `path`, so readers never see
+    a partly written file and existing memory maps of the old one stay
+    valid. Returns the inode of the new file, which a manifest records
+    so that a reader can tell it was written alongside that file.
+    """
+    temporary = f"{path}.{os.getpid()}"
+    try:
+        with open(temporary, mode) as f:
+            write(f)
+            inode = os.fstat(f.fileno()).st_ino
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return inode
+
+
+def load(directory):
+    """
+    Returns the parts saved in the snapshot of `directory`, each a
+    memory-mapped view, so loading costs no more for a large dataset
+    than for a small one.
+
+    Returns None if there is no snapshot or any source file changed.
+    """
+    path = os.path.join(directory, CACHE_DIR)
+    try:
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+        if (manifest["version"] != VERSION or
+                manifest["sources"] != fingerprint(directory)):
+            return None
+
+        with open(os.path.join(path, "arrays.bin"), "rb") as f:
+
+            # A different file means the snapshot was rebuilt after the
+            # manifest was read; its layout would not match
+            if os.fstat(f.fileno()).st_ino != manifest["inode"]:
+                return None
+            buffer = memoryview(
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            )
+    except (OSError, ValueError, KeyError):
+        return None
+
+    parts = {}
+    for entry in manifest["arrays"]:
+        size = entry["length"] * array(entry["typecode"]).itemsize
+        parts[entry["name"]] = buffer[
+            entry["offset"]:entry["offset"] + size
+        ].cast(entry["typecode"])
+    return parts
@@ -0,0 +1,205 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+
+class Column():
+    """
+    Read-only sequence of strings, stored as one UTF-8 buffer `data`
+    and an array of `offsets` into it, so that a snapshot can map it
+    straight from disk. String `i` is `data[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def build(cls, strings):
+        """
+        Builds a column holding `strings`, in order.
+        """
+        offsets = array("q", [0])
+        data = bytearray()
+        for string in strings:
+            data += string.encode("utf-8")
+            offsets.append(len(data))
+        return cls(offsets, data)
+
+    @classmethod
+    def from_parts(cls, parts):
+        return cls(parts["offsets"], parts["data"])
+
+    def parts(self):
+        return {"offsets": self.offsets, "data": self.data}
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("column index out of range")
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class Index(Mapping):
+    """
+    Maps each string of a Column to its position, by binary search over
+    `order`, the positions of the column sorted by their strings.
+    """
+
+    def __init__(self, column, order):
+        self.column = column
+        self.order = order
+
+    @classmethod
+    def build(cls, strings):
+        """
+        Builds the index of a Column holding `strings`, a list.
+        """
+        order = array("i", sorted(
+            range(len(strings)), key=strings.__getitem__
+        ))
+        return cls(Column.build(strings), order)
+
+    def __getitem__(self, key):
+        low, high = 0, len(self.order)
+        while low < high:
+            middle = (low + high) // 2
+            if self.column[self.order[middle]] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.order) and self.column[self.order[low]] == key:
+            return self.order[low]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.column)
+
+    def __len__(self):
+        return len(self.column)
+
+
+class Groups(Mapping):
+    """
+    Maps each string of the sorted Column `keys` to a run of integers:
+    key `i` maps to `values[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, keys, offsets, values):
+        self.keys = keys
+        self.offsets = offsets
+        self.values = values
+
+    @classmethod
+    def build(cls, groups):
+        """
+        Builds the groups of `groups`, a dict of strings to integers.
+        """
+        keys = sorted(groups)
+        offsets = array("q", [0])
+        values = array("i")
+        for key in keys:
+            values.extend(groups[key])
+            offsets.append(len(values))
+        return cls(Column.build(keys), offsets, values)
+
+    @classmethod
+    def from_parts(cls, parts):
+        return cls(
+            Column.from_parts(section(parts, "keys")),
+            parts["offsets"], parts["values"]
+        )
+
+    def parts(self):
+        return {
+            "keys": self.keys,
+            "offsets": self.offsets,
+            "values": self.values
+        }
+
+    def __getitem__(self, key):
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.values[self.offsets[i]:self.offsets[i + 1]]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class Records(Mapping):
+    """
+    Maps ids to a dict of their `fields`, each a Column whose strings
+    are in the order of the positions given by `index`.
+    """
+
+    def __init__(self, index, fields):
+        self.index = index
+        self.fields = fields
+
+    def __getitem__(self, key):
+        i = self.index[key]
+        return {name: column[i] for name, column in self.fields.items()}
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+
+class IdSets(Mapping):
+    """
+    Maps each key of `groups` to the set of `ids` at its positions.
+    """
+
+    def __init__(self, groups, ids):
+        self.groups = groups
+        self.ids = ids
+
+    def __getitem__(self, key):
+        return {self.ids[i] for i in self.groups[key]}
+
+    def __iter__(self):
+        return iter(self.groups)
+
+    def __len__(self):
+        return len(self.groups)
+
+
+def flatten(parts, prefix=""):
+    """
+    Returns {dotted name: buffer} for `parts`, a dict whose values are
+    buffers, dicts, or objects with a `parts` method.
+    """
+    flat = {}
+    for name, value in parts.items():
+        if hasattr(value, "parts"):
+            value = value.parts()
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{name}."))
+        else:
+            flat[prefix + name] = value
+    return flat
+
+
+def section(flat, prefix):
+    """
+    Returns the entries of a flattened dict under `prefix`, undotted.
+    """
+    prefix += "."
+    return {
+        name[len(prefix):]: value
+        for name, value in flat.items() if name.startswith(prefix)
+    }
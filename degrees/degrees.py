@@ -1,22 +1,94 @@
+import argparse
 import csv
+import itertools
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+from collections import deque
 
-# Maps names to a set of corresponding person_ids
+import batch
+import cache
+from columns import Column, Groups, IdSets, Records, flatten, section
+from graph import Graph, join_paths
+from landmarks import LandmarkIndex
+from nameindex import NameIndex
+
+# Details kept for each person and each movie
+PEOPLE_FIELDS = ("name", "birth")
+MOVIE_FIELDS = ("title", "year")
+
+# Maps lowercase names to a set of corresponding person_ids
 names = {}
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
+# Maps person_ids to a dictionary of: name, birth
+# (a person's movies are read from `graph`)
 people = {}
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
+# Maps movie_ids to a dictionary of: title, year
+# (a movie's stars are read from `graph`)
 movies = {}
 
+# Once data is loaded, `names`, `people` and `movies` are read-only
+# mappings over the columns of columns.py rather than dicts
+
+# Integer-indexed CSR form of the person-movie graph, built by load_data
+graph = None
+
+# Landmark distances for pruning searches, if an index was built
+landmarks = None
 
-def load_data(directory):
+# Prefix and fuzzy lookup over the keys of `names`, built by load_data
+name_index = None
+
+
+def load_data(directory, rebuild_cache=False):
     """
     Load data from CSV files into memory.
+
+    Reuses the snapshot written by an earlier run when none of the
+    CSV files changed since, unless `rebuild_cache` is set. Everything
+    is read from flat arrays and string columns, which a snapshot maps
+    straight from disk, so reloading does not grow with the dataset.
+
+    The movies of each person and the stars of each movie are kept
+    only in `graph`; `people` and `movies` hold just their details.
+    """
+    global names, people, movies
+    global graph, landmarks, name_index
+
+    landmarks = LandmarkIndex.load(directory)
+    parts = None if rebuild_cache else cache.load(directory)
+    if parts is None:
+        parts = flatten(read_data(directory))
+
+        # A read-only data directory just means no snapshot for next time
+        try:
+            cache.save(directory, parts)
+        except OSError:
+            pass
+
+    graph = Graph.from_parts(section(parts, "graph"))
+    name_index = NameIndex.from_parts(section(parts, "name_index"))
+    names = IdSets(Groups.from_parts(section(parts, "names")),
+                   graph.person_ids)
+    people = Records(graph.person_index, {
+        field: Column.from_parts(section(parts, f"people.{field}"))
+        for field in PEOPLE_FIELDS
+    })
+    movies = Records(graph.movie_index, {
+        field: Column.from_parts(section(parts, f"movies.{field}"))
+        for field in MOVIE_FIELDS
+    })
+
+
+def read_data(directory):
     """
+    Reads the CSV files of `directory` and returns the graph, name
+    index and columns that load_data is built from.
+    """
+    names = {}
+    people = {}
+    movies = {}
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -51,15 +123,70 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    graph = Graph.from_data(people, movies)
+    numbers = {person_id: i for i, person_id in enumerate(people)}
+    return {
+        "graph": graph,
+        "name_index": NameIndex.build(names, people, graph),
+        "names": Groups.build({
+            name: sorted(numbers[person_id] for person_id in person_ids)
+            for name, person_ids in names.items()
+        }),
+        "people": {
+            field: Column.build(person[field] for person in people.values())
+            for field in PEOPLE_FIELDS
+        },
+        "movies": {
+            field: Column.build(movie[field] for movie in movies.values())
+            for field in MOVIE_FIELDS
+        }
+    }
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        description="Find the degrees of separation between two people."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument(
+        "--rebuild-cache", action="store_true",
+        help="re-parse the CSV files even if a valid snapshot exists"
+    )
+    parser.add_argument(
+        "--batch", metavar="FILE",
+        help="answer tab-separated source/target pairs from FILE "
+             "('-' for stdin) as JSON lines"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="number of worker processes for --batch (default: all CPUs)"
+    )
+    several = parser.add_mutually_exclusive_group()
+    several.add_argument(
+        "--all", action="store_true",
+        help="print every shortest path instead of just one"
+    )
+    several.add_argument(
+        "--k", type=int, metavar="K",
+        help="print up to K shortest paths"
+    )
+    args = parser.parse_args()
+    if args.k is not None and args.k < 1:
+        parser.error("--k must be at least 1")
+
+    if args.batch is not None:
+        if args.batch == "-":
+            lines = sys.stdin
+        else:
+            lines = open(args.batch, encoding="utf-8")
+        with lines:
+            batch.run(lines, sys.stdout, args.directory,
+                      workers=args.workers, rebuild_cache=args.rebuild_cache)
+        return
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(args.directory, rebuild_cache=args.rebuild_cache)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,19 +196,43 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
+    sizes = [component_size(person_id) for person_id in (source, target)]
+    print(f"Component sizes: {sizes[0]} and {sizes[1]} people.")
+
+    if args.all or args.k is not None:
+        paths = all_shortest_paths(source, target)
+        if args.k is not None:
+            paths = itertools.islice(paths, args.k)
+        count = 0
+        for count, path in enumerate(paths, 1):
+            if count == 1:
+                print(f"{len(path)} degrees of separation.")
+            print(f"Path {count}:")
+            print_path(source, path)
+        if count == 0:
+            print("Not connected.")
+        return
+
     path = shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
     else:
-        degrees = len(path)
-        print(f"{degrees} degrees of separation.")
-        path = [(None, source)] + path
-        for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
-            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+        print(f"{len(path)} degrees of separation.")
+        print_path(source, path)
+
+
+def print_path(source, path):
+    """
+    Prints each step of a (movie_id, person_id) path from the source.
+    """
+    degrees = len(path)
+    path = [(None, source)] + path
+    for i in range(degrees):
+        person1 = people[path[i][1]]["name"]
+        person2 = people[path[i + 1][1]]["name"]
+        movie = movies[path[i + 1][0]]["title"]
+        print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
 def shortest_path(source, target):
@@ -90,31 +241,146 @@ def shortest_path(source, target):
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    Uses a search pruned by the landmark index when one was built.
+    Otherwise runs a breadth-first search from both ends at once, always
+    expanding the smaller of the two frontiers by one full layer, and
+    stops as soon as the two searches meet.
+    """
+    if source == target:
+        return []
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+    if not graph.connected(source, target):
+        return None
+
+    if landmarks is not None:
+        path = landmarks.search(graph, source, target)
+        return None if path is None else ids_for(path)
+
+    # Maps each reached person to the (person, movie) they were reached
+    # through, towards the source and towards the target respectively
+    forward = {source: None}
+    backward = {target: None}
+    forwardFrontier = deque([source])
+    backwardFrontier = deque([target])
+
+    # Movies whose casts each search has already added to its frontier
+    forwardMovies = set()
+    backwardMovies = set()
+
+    while forwardFrontier and backwardFrontier:
+        if len(forwardFrontier) <= len(backwardFrontier):
+            meeting = expand_layer(
+                forwardFrontier, forward, forwardMovies, backward
+            )
+        else:
+            meeting = expand_layer(
+                backwardFrontier, backward, backwardMovies, forward
+            )
+        if meeting is not None:
+            return ids_for(join_paths(meeting, forward, backward))
+    return None
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, one at a time.
+
+    Yields nothing if there is no possible path.
+    """
+    if source == target:
+        yield []
+        return
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+    if not graph.connected(source, target):
+        return
+
+    # Walk back from the target through the layered DAG, one
+    # predecessor per step; every walk ends at the source
+    predecessors = shortest_path_dag(source, target)
+    stack = [(target, iter(predecessors[target]))]
+    steps = []
+    while stack:
+        person, choices = stack[-1]
+        choice = next(choices, None)
+        if choice is None:
+            stack.pop()
+            if steps:
+                steps.pop()
+            continue
+        previous, movie = choice
+        steps.append((movie, person))
+        if previous == source:
+            yield ids_for(reversed(steps))
+            steps.pop()
+        else:
+            stack.append((previous, iter(predecessors[previous])))
+
+
+def shortest_path_dag(source, target):
+    """
+    Runs a breadth-first search from the source number until the layer
+    holding the target number is complete.
+
+    Returns a dict mapping every reached person number to all of its
+    (person, movie) number predecessors in the previous layer.
+    """
+    depths = {source: 0}
+    predecessors = {source: []}
+    layer = [source]
+    depth = 0
+    while layer and target not in depths:
+        depth += 1
+        nextLayer = []
+        for person in layer:
+            for movie in graph.movies_of(person):
+                for neighbor in graph.stars_of(movie):
+                    known = depths.get(neighbor)
+                    if known is None:
+                        depths[neighbor] = depth
+                        predecessors[neighbor] = [(person, movie)]
+                        nextLayer.append(neighbor)
+                    elif known == depth:
+                        predecessors[neighbor].append((person, movie))
+        layer = nextLayer
+    return predecessors
+
+
+def expand_layer(frontier, visited, expanded, otherVisited):
     """
-    ret = None
-    explored = set()
-    frontier = QueueFrontier()
-    start = Node(state=source, parent=None, action=None)
-    frontier.add(start)
-    
-    while True:
-        if frontier.empty():
-            break
-        node = frontier.remove()
-        explored.add(node.state)
-        a = neighbors_for_person(node.state)
-        for movie, actor in a:
-            if not((actor in explored) or (frontier.contains_state(actor))):
-                newActor = Node(state=actor, parent=node, action=movie)
-                if newActor.state == target:
-                    pairs = []
-                    while newActor.parent:
-                        pairs = [(newActor.action,newActor.state),] + pairs
-                        newActor = newActor.parent
-                    return pairs 
-                frontier.add(newActor)
-    return ret
+    Expands every person currently in `frontier` by one step, recording
+    new people in `visited` and queueing them for the next layer.
+    Movies in `expanded` are skipped, since their whole cast was reached.
+
+    Returns the first person also reached by the other search, or None.
+    """
+    for _ in range(len(frontier)):
+        person = frontier.popleft()
+        for movie in graph.movies_of(person):
+            if movie in expanded:
+                continue
+            expanded.add(movie)
+            for neighbor in graph.stars_of(movie):
+                if neighbor in visited:
+                    continue
+                visited[neighbor] = (person, movie)
+                if neighbor in otherVisited:
+                    return neighbor
+                frontier.append(neighbor)
+    return None
+
 
+def ids_for(path):
+    """
+    Translates a (movie, person) number path into IMDB ids.
+    """
+    return [
+        (graph.movie_ids[movie], graph.person_ids[person])
+        for movie, person in path
+    ]
 
 
 def person_id_for_name(name):
@@ -124,6 +390,9 @@ def person_id_for_name(name):
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
+        suggestions = name_index.fuzzy(name, k=5)
+        if suggestions:
+            print(f"Did you mean: {', '.join(suggestions)}?")
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
@@ -143,17 +412,24 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def component_size(person_id):
+    """
+    Returns the number of people connected to a person, including
+    the person themselves.
+    """
+    return graph.component_size(graph.person_index[person_id])
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
-    who starred with a given person.
-    """
-    movie_ids = people[person_id]["movies"]
-    neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
-    return neighbors
+    who starred with a given person, as a tuple, read from the graph.
+    """
+    person = graph.person_index[person_id]
+    return tuple(
+        (graph.movie_ids[movie], graph.person_ids[neighbor])
+        for movie, neighbor in graph.neighbors(person)
+    )
 
 
 if __name__ == "__main__":
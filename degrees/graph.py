@@ -0,0 +1,212 @@
+from array import array
+
+from columns import Column, Index, section
+
+# Integer arrays of a graph, besides its id columns
+ARRAYS = [
+    "person_offsets", "person_movies", "movie_offsets", "movie_people",
+    "components", "component_sizes", "person_order", "movie_order"
+]
+
+
+class Graph():
+    """
+    Person-movie bipartite graph in compressed sparse row form.
+
+    People and movies are numbered with dense ints. The movies of person
+    `p` are `person_movies[person_offsets[p]:person_offsets[p + 1]]`, and
+    the stars of movie `m` are
+    `movie_people[movie_offsets[m]:movie_offsets[m + 1]]`.
+
+    `components[p]` numbers the connected component of person `p`,
+    and `component_sizes[c]` counts the people in component `c`.
+
+    `person_ids` and `movie_ids` are Columns of IMDB ids by number, and
+    `person_order` and `movie_order` list the numbers sorted by id, so
+    that `person_index` and `movie_index` map ids back to numbers
+    without building a dict.
+    """
+
+    def __init__(self, person_ids, movie_ids,
+                 person_offsets, person_movies, movie_offsets, movie_people,
+                 components, component_sizes, person_order, movie_order):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.person_order = person_order
+        self.movie_order = movie_order
+        self.person_index = Index(person_ids, person_order)
+        self.movie_index = Index(movie_ids, movie_order)
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        self.components = components
+        self.component_sizes = component_sizes
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """
+        Builds a graph from the `people` and `movies` dicts
+        filled in by degrees.load_data.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        person_offsets, person_movies = compress(
+            (people[person_id]["movies"] for person_id in person_ids),
+            movie_index
+        )
+        movie_offsets, movie_people = compress(
+            (movies[movie_id]["stars"] for movie_id in movie_ids),
+            person_index
+        )
+        components, component_sizes = label_components(
+            len(person_ids), movie_offsets, movie_people
+        )
+        person_index = Index.build(person_ids)
+        movie_index = Index.build(movie_ids)
+        return cls(person_index.column, movie_index.column,
+                   person_offsets, person_movies, movie_offsets, movie_people,
+                   components, component_sizes,
+                   person_index.order, movie_index.order)
+
+    @classmethod
+    def from_parts(cls, parts):
+        """
+        Rebuilds a graph from the buffers returned by `parts`.
+        """
+        return cls(
+            Column.from_parts(section(parts, "person_ids")),
+            Column.from_parts(section(parts, "movie_ids")),
+            **{name: parts[name] for name in ARRAYS}
+        )
+
+    def parts(self):
+        """
+        Returns the id columns and arrays of the graph by name.
+        """
+        parts = {name: getattr(self, name) for name in ARRAYS}
+        parts["person_ids"] = self.person_ids
+        parts["movie_ids"] = self.movie_ids
+        return parts
+
+    def movies_of(self, person):
+        """
+        Returns the movie numbers a person number starred in.
+        """
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]
+
+    def stars_of(self, movie):
+        """
+        Returns the person numbers that starred in a movie number.
+        """
+        return self.movie_people[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]
+        ]
+
+    def degree(self, person):
+        """
+        Returns the number of movies a person number starred in.
+        """
+        return self.person_offsets[person + 1] - self.person_offsets[person]
+
+    def connected(self, source, target):
+        """
+        Returns whether two person numbers are in the same component.
+        """
+        return self.components[source] == self.components[target]
+
+    def component_size(self, person):
+        """
+        Returns the number of people in a person number's component.
+        """
+        return self.component_sizes[self.components[person]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) number pairs for people
+        who starred with a given person number.
+        """
+        for movie in self.movies_of(person):
+            for star in self.stars_of(movie):
+                yield movie, star
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Builds the (movie, person) number path from the source to the target
+    through `meeting`, the person where both searches met.
+
+    `forward` and `backward` map each person a search reached to the
+    (person, movie) it was reached through, or None for its start.
+    """
+    path = []
+    person = meeting
+    while forward[person] is not None:
+        previous, movie = forward[person]
+        path.append((movie, person))
+        person = previous
+    path.reverse()
+
+    person = meeting
+    while backward[person] is not None:
+        following, movie = backward[person]
+        path.append((movie, following))
+        person = following
+    return path
+
+
+def compress(rows, index):
+    """
+    Returns the (offsets, indices) arrays for `rows`, an iterable of
+    collections of ids, with each id numbered through `index`.
+    """
+    offsets = array("q", [0])
+    indices = array("i")
+    for row in rows:
+        indices.extend(sorted(index[key] for key in row))
+        offsets.append(len(indices))
+    return offsets, indices
+
+
+def label_components(size, movie_offsets, movie_people):
+    """
+    Returns (components, component_sizes) arrays for `size` people,
+    using union-find over the stars of every movie.
+    """
+    parents = array("i", range(size))
+
+    def find(person):
+        root = person
+        while parents[root] != root:
+            root = parents[root]
+        while parents[person] != root:
+            parents[person], person = root, parents[person]
+        return root
+
+    for movie in range(len(movie_offsets) - 1):
+        stars = movie_people[movie_offsets[movie]:movie_offsets[movie + 1]]
+        if len(stars) < 2:
+            continue
+        root = find(stars[0])
+        for star in stars[1:]:
+            other = find(star)
+            if other != root:
+                parents[other] = root
+
+    # Renumber the roots densely, in order of first appearance
+    labels = {}
+    components = array("i", [0]) * size
+    component_sizes = array("i")
+    for person in range(size):
+        root = find(person)
+        if root not in labels:
+            labels[root] = len(component_sizes)
+            component_sizes.append(0)
+        components[person] = labels[root]
+        component_sizes[labels[root]] += 1
+    return components, component_sizes
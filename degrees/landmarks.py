@@ -0,0 +1,254 @@
+import argparse
+import json
+import mmap
+import os
+import sys
+
+from array import array
+from collections import deque
+
+import cache
+from graph import join_paths
+
+# Number of landmarks built by default
+LANDMARKS = 32
+
+# Number of landmarks consulted for each query
+ACTIVE = 4
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = -1
+
+
+class LandmarkIndex():
+    """
+    Hop distances from a few landmark people to everyone else,
+    used as admissible lower bounds (ALT) to prune path searches.
+    """
+
+    def __init__(self, landmarks, distances):
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, count=LANDMARKS):
+        """
+        Runs a BFS from each of the `count` highest-degree people.
+        """
+        people = range(len(graph.person_ids))
+        landmarks = sorted(people, key=graph.degree, reverse=True)[:count]
+        return cls(landmarks, [distances_from(graph, l) for l in landmarks])
+
+    @classmethod
+    def load(cls, directory):
+        """
+        Returns the index saved for `directory`, or None if there
+        is none or the data changed since it was built.
+        """
+        path = os.path.join(directory, cache.CACHE_DIR)
+        try:
+            with open(os.path.join(path, "landmarks.json")) as f:
+                manifest = json.load(f)
+            if manifest["sources"] != cache.fingerprint(directory):
+                return None
+            with open(os.path.join(path, "landmarks.bin"), "rb") as f:
+                if os.fstat(f.fileno()).st_ino != manifest["inode"]:
+                    return None
+                buffer = memoryview(
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                ).cast("h")
+        except (OSError, ValueError, KeyError):
+            return None
+
+        size = manifest["people"]
+        distances = [
+            buffer[i * size:(i + 1) * size]
+            for i in range(len(manifest["landmarks"]))
+        ]
+        return cls(manifest["landmarks"], distances)
+
+    def save(self, directory):
+        """
+        Writes the index next to the snapshot of `directory`, the
+        same way as cache.save: distances first, then the manifest,
+        each moved into place whole.
+        """
+        path = os.path.join(directory, cache.CACHE_DIR)
+        os.makedirs(path, exist_ok=True)
+
+        def write_distances(f):
+            for row in self.distances:
+                f.write(memoryview(row).cast("B"))
+
+        inode = cache.replace(
+            os.path.join(path, "landmarks.bin"), "wb", write_distances
+        )
+        manifest = {
+            "sources": cache.fingerprint(directory),
+            "inode": inode,
+            "landmarks": self.landmarks,
+            "people": len(self.distances[0]) if self.distances else 0
+        }
+        cache.replace(os.path.join(path, "landmarks.json"), "w",
+                      lambda f: json.dump(manifest, f))
+
+    def search(self, graph, source, target):
+        """
+        Returns the shortest list of (movie, person) number pairs
+        connecting two person numbers, or None if they are not connected.
+
+        Searches from both ends, dropping every person whose landmark
+        lower bound shows they cannot lie on a shortest path.
+        """
+        rows = self.active(source, target)
+        if rows is None:
+            return None
+        limit = self.upper_bound(source, target)
+
+        # Maps each reached person to the (person, movie) they were
+        # reached through, towards the end its search started from
+        forward = {source: None}
+        backward = {target: None}
+        sides = [
+            Side(source, forward, [(row, row[target]) for row in rows]),
+            Side(target, backward, [(row, row[source]) for row in rows])
+        ]
+
+        while all(side.frontier for side in sides):
+            side, other = sorted(sides, key=lambda side: len(side.frontier))
+            meeting = side.expand(graph, other.reached, limit)
+            if meeting is not None:
+                return join_paths(meeting, forward, backward)
+        return None
+
+    def upper_bound(self, source, target):
+        """
+        Returns the length of the shortest route between two person
+        numbers through any landmark, or infinity if none exists.
+        """
+        limit = float("inf")
+        for row in self.distances:
+            start, end = row[source], row[target]
+            if start != UNREACHABLE and end != UNREACHABLE:
+                limit = min(limit, start + end)
+        return limit
+
+    def active(self, source, target):
+        """
+        Returns the distance rows giving the tightest bounds between
+        two person numbers, or None if a landmark proves they are not
+        connected.
+        """
+        scored = []
+        for row in self.distances:
+            start, end = row[source], row[target]
+            if (start == UNREACHABLE) != (end == UNREACHABLE):
+                return None
+            if start != UNREACHABLE:
+                scored.append((abs(start - end), row))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return [row for _, row in scored[:ACTIVE]]
+
+
+def distances_from(graph, landmark):
+    """
+    Returns an array of hop distances from a person number to every
+    person, with UNREACHABLE for people in other components.
+    """
+    distances = array("h", [UNREACHABLE]) * len(graph.person_ids)
+    distances[landmark] = 0
+    expanded = set()
+    frontier = deque([landmark])
+    while frontier:
+        person = frontier.popleft()
+        for movie in graph.movies_of(person):
+            if movie in expanded:
+                continue
+            expanded.add(movie)
+            for neighbor in graph.stars_of(movie):
+                if distances[neighbor] == UNREACHABLE:
+                    distances[neighbor] = distances[person] + 1
+                    frontier.append(neighbor)
+    return distances
+
+
+class Side():
+    """
+    One end of a landmark-pruned bidirectional search.
+    """
+
+    def __init__(self, start, reached, bounds):
+        self.reached = reached
+        self.bounds = bounds
+        self.frontier = deque([start])
+        self.expanded = set()
+        self.pruned = set()
+        self.depth = 0
+
+    def lower_bound(self, person):
+        """
+        Returns the triangle-inequality lower bound on the hops from
+        a person number to the other end of the search.
+        """
+        best = 0
+        for row, distance in self.bounds:
+            best = max(best, abs(distance - row[person]))
+        return best
+
+    def expand(self, graph, other, limit):
+        """
+        Expands the frontier by one layer, keeping only people that
+        can still be on a path of at most `limit` hops.
+
+        Returns the first person also reached by the other side, or None.
+        People dropped this way lie on no shortest path, so the people
+        that do are still reached in the same layer as without pruning.
+        """
+        self.depth += 1
+        for _ in range(len(self.frontier)):
+            person = self.frontier.popleft()
+            for movie in graph.movies_of(person):
+                if movie in self.expanded:
+                    continue
+                self.expanded.add(movie)
+                for neighbor in graph.stars_of(movie):
+                    if neighbor in self.reached or neighbor in self.pruned:
+                        continue
+                    if neighbor in other:
+                        self.reached[neighbor] = (person, movie)
+                        return neighbor
+                    if self.depth + self.lower_bound(neighbor) > limit:
+                        self.pruned.add(neighbor)
+                        continue
+                    self.reached[neighbor] = (person, movie)
+                    self.frontier.append(neighbor)
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the landmark index used by degrees.py."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--count", type=int, default=LANDMARKS,
+                        help="number of landmarks to build")
+    args = parser.parse_args()
+
+    # Imported here since degrees imports this module
+    import degrees
+
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    print("Data loaded.")
+
+    print(f"Building {args.count} landmarks...")
+    index = LandmarkIndex.build(degrees.graph, args.count)
+    try:
+        index.save(args.directory)
+    except OSError as e:
+        sys.exit(f"Could not save landmark index: {e}")
+    print("Landmark index saved.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import heapq
+
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from columns import Column, Groups, section
+
+# Number of candidates returned by default
+TOP = 10
+
+# Dice similarity of trigrams below which a name is not suggested
+MIN_SIMILARITY = 0.5
+
+
+class NameIndex():
+    """
+    Prefix and fuzzy lookup over the lowercase names in degrees.names,
+    ranking candidates by how many movies their person starred in.
+    """
+
+    def __init__(self, keys, titles, weights, tree, sizes, grams):
+        self.keys = keys
+        self.titles = titles
+        self.weights = weights
+
+        # Segment tree over the sorted keys, each node holding the
+        # index of the heaviest key below it
+        self.tree = tree
+
+        # Trigram counts of each key, and the keys holding each trigram
+        self.sizes = sizes
+        self.grams = grams
+
+    @classmethod
+    def build(cls, names, people, graph):
+        """
+        Builds the index from the `names` and `people` dicts
+        and the graph filled in by degrees.load_data.
+        """
+
+        numbers = {
+            person_id: i for i, person_id in enumerate(graph.person_ids)
+        }
+
+        def degree(person_id):
+            return graph.degree(numbers[person_id])
+
+        keys = sorted(names)
+        titles = []
+        weights = array("i")
+        for key in keys:
+            best = max(names[key], key=degree)
+            titles.append(people[best]["name"])
+            weights.append(degree(best))
+
+        size = len(keys)
+        index = cls(Column.build(keys), Column.build(titles), weights,
+                    array("i", [0]) * size + array("i", range(size)),
+                    array("H"), None)
+        for node in range(size - 1, 0, -1):
+            index.tree[node] = index.heavier(
+                index.tree[2 * node], index.tree[2 * node + 1]
+            )
+
+        grams = {}
+        for i, key in enumerate(keys):
+            key_grams = trigrams(key)
+            index.sizes.append(min(len(key_grams), 0xFFFF))
+            for gram in key_grams:
+                grams.setdefault(gram, array("i")).append(i)
+        index.grams = Groups.build(grams)
+        return index
+
+    @classmethod
+    def from_parts(cls, parts):
+        """
+        Rebuilds an index from the buffers returned by `parts`.
+        """
+        return cls(
+            Column.from_parts(section(parts, "keys")),
+            Column.from_parts(section(parts, "titles")),
+            parts["weights"], parts["tree"], parts["sizes"],
+            Groups.from_parts(section(parts, "grams"))
+        )
+
+    def parts(self):
+        """
+        Returns the columns and arrays of the index by name.
+        """
+        return {
+            "keys": self.keys,
+            "titles": self.titles,
+            "weights": self.weights,
+            "tree": self.tree,
+            "sizes": self.sizes,
+            "grams": self.grams
+        }
+
+    def prefix(self, query, k=TOP):
+        """
+        Returns up to `k` names starting with `query`, most movies first.
+        """
+        query = query.lower()
+        if not query:
+            return []
+        start = bisect_left(self.keys, query)
+        end = bisect_left(self.keys, query + "\uffff", start)
+
+        # Take the heaviest key of a range, then split the range around it
+        matches = []
+        ranges = []
+        if start < end:
+            ranges.append(self.ranked(start, end))
+        while ranges and len(matches) < k:
+            _, best, start, end = heapq.heappop(ranges)
+            matches.append(best)
+            for low, high in ((start, best), (best + 1, end)):
+                if low < high:
+                    heapq.heappush(ranges, self.ranked(low, high))
+        return [self.titles[i] for i in matches]
+
+    def fuzzy(self, query, k=TOP):
+        """
+        Returns up to `k` names most similar to `query`, by the Dice
+        similarity of their character trigrams, breaking ties by most
+        movies. Names below MIN_SIMILARITY are left out.
+        """
+        grams = trigrams(query.lower())
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.grams.get(gram, ()))
+        similarity = {
+            i: 2 * count / (len(grams) + self.sizes[i])
+            for i, count in shared.items()
+        }
+        matches = heapq.nlargest(
+            k,
+            (i for i in similarity if similarity[i] >= MIN_SIMILARITY),
+            key=lambda i: (similarity[i], self.weights[i])
+        )
+        return [self.titles[i] for i in matches]
+
+    def heavier(self, a, b):
+        """
+        Returns whichever of two key indices has more movies,
+        preferring the alphabetically first on ties.
+        """
+        if (self.weights[b], -b) > (self.weights[a], -a):
+            return b
+        return a
+
+    def ranked(self, start, end):
+        """
+        Returns a heap entry for the heaviest key in [start, end).
+        """
+        size = len(self.keys)
+        best = None
+        low, high = start + size, end + size
+        while low < high:
+            if low & 1:
+                best = self.tree[low] if best is None else self.heavier(
+                    best, self.tree[low]
+                )
+                low += 1
+            if high & 1:
+                high -= 1
+                best = self.tree[high] if best is None else self.heavier(
+                    best, self.tree[high]
+                )
+            low //= 2
+            high //= 2
+        return (-self.weights[best], best, start, end)
+
+
+def trigrams(text):
+    """
+    Returns the set of character trigrams of `text`, padded so that
+    its first and last characters form trigrams of their own.
+    """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
@@ -0,0 +1,248 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import threading
+
+import batch
+import degrees
+from nameindex import TOP
+from util import LRUCache
+
+HOST = "127.0.0.1"
+PORT = 5050
+
+# Number of (source, target) results kept in memory
+CACHE_SIZE = 10000
+
+# Marks a path missing from the cache, since None means "not connected"
+MISSING = object()
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """
+    Answers newline-delimited JSON requests on one connection,
+    one JSON response line per request.
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                response = dispatch(request, self.server.paths)
+            except (ValueError, TypeError, KeyError) as e:
+                response = {"ok": False, "error": f"bad request: {e}"}
+            except LookupError as e:
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def dispatch(request, paths):
+    """
+    Returns the response to one request, a dict with an "op" of:
+        * "ping", answered with the number of people loaded,
+        * "resolve", listing the people matching "name",
+        * "complete", the top "k" names starting with "prefix",
+        * "suggest", the top "k" names most similar to "name",
+        * "path", the shortest path between "source" and "target",
+          each an IMDB id or an unambiguous name.
+    """
+    op = request["op"]
+    if op == "ping":
+        return {"ok": True, "people": len(degrees.people)}
+
+    if op == "resolve":
+        name = text(request, "name")
+        person_ids = degrees.names.get(name.lower(), set())
+        return {
+            "ok": True,
+            "people": [
+                {
+                    "id": person_id,
+                    "name": degrees.people[person_id]["name"],
+                    "birth": degrees.people[person_id]["birth"]
+                }
+                for person_id in sorted(person_ids)
+            ]
+        }
+
+    if op == "complete":
+        k = request.get("k", TOP)
+        return {"ok": True, "names": degrees.name_index.prefix(
+            text(request, "prefix"), k
+        )}
+
+    if op == "suggest":
+        k = request.get("k", TOP)
+        return {"ok": True, "names": degrees.name_index.fuzzy(
+            text(request, "name"), k
+        )}
+
+    if op == "path":
+        source = batch.resolve(text(request, "source"))
+        target = batch.resolve(text(request, "target"))
+        key = (source, target)
+        path = paths.get(key, MISSING)
+        cached = path is not MISSING
+        if not cached:
+            path = degrees.shortest_path(source, target)
+            paths.put(key, path)
+        return {
+            "ok": True,
+            "source": source,
+            "target": target,
+            "degrees": None if path is None else len(path),
+            "path": path,
+            "cached": cached
+        }
+
+    raise ValueError(f"unknown op {op!r}")
+
+
+def text(request, field):
+    """
+    Returns a string field of a request, raising TypeError if the
+    field holds anything else.
+    """
+    value = request[field]
+    if not isinstance(value, str):
+        raise TypeError(f"{field!r} must be a string")
+    return value
+
+
+def remove_stale(path):
+    """
+    Removes the Unix socket at `path` if no server is listening on it,
+    as left behind by a server that was killed.
+    """
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return
+    except FileNotFoundError:
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.remove(path)
+    finally:
+        probe.close()
+
+
+def serve(directory, address, cache_size=CACHE_SIZE):
+    """
+    Loads `directory` and answers requests until interrupted or
+    terminated, on a (host, port) pair or on a Unix socket path.
+    """
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    if isinstance(address, tuple):
+        server = TCPServer(address, Handler)
+    else:
+        remove_stale(address)
+        server = UnixServer(address, Handler)
+    server.paths = LRUCache(cache_size)
+
+    # Stop on SIGTERM the same way as on Ctrl-C, so the socket is
+    # removed; handlers can only be set from the main thread
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    with server:
+        print(f"Listening on {address}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if not isinstance(address, tuple):
+                os.remove(address)
+
+
+class Client():
+    """
+    Minimal blocking client for a running server.
+    """
+
+    def __init__(self, address=(HOST, PORT)):
+        if isinstance(address, tuple):
+            family = socket.AF_INET
+        else:
+            family = socket.AF_UNIX
+        self.socket = socket.socket(family, socket.SOCK_STREAM)
+        self.socket.connect(address)
+        self.file = self.socket.makefile("rwb")
+
+    def request(self, op, **fields):
+        """
+        Sends one request and returns the decoded response,
+        raising LookupError if the server reports an error.
+        """
+        message = json.dumps(dict(fields, op=op))
+        self.file.write(message.encode("utf-8") + b"\n")
+        self.file.flush()
+        response = json.loads(self.file.readline())
+        if not response["ok"]:
+            raise LookupError(response["error"])
+        return response
+
+    def resolve(self, name):
+        return self.request("resolve", name=name)["people"]
+
+    def complete(self, prefix, k=TOP):
+        return self.request("complete", prefix=prefix, k=k)["names"]
+
+    def suggest(self, name, k=TOP):
+        return self.request("suggest", name=name, k=k)["names"]
+
+    def path(self, source, target):
+        return self.request("path", source=source, target=target)["path"]
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve degrees of separation queries from memory."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--socket", metavar="PATH",
+                        help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE,
+                        help="number of path results to keep")
+    args = parser.parse_args()
+
+    address = args.socket or (args.host, args.port)
+    serve(args.directory, address, args.cache_size)
+
+
+if __name__ == "__main__":
+    main()
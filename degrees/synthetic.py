@@ -0,0 +1,108 @@
+import argparse
+import csv
+import itertools
+import os
+import random
+
+# Average number of stars rows per person and per movie
+ROWS_PER_PERSON = 4
+ROWS_PER_MOVIE = 5
+
+# Pareto shape of cast sizes, and Zipf exponent of how often
+# each person is cast; both give a few huge hubs and a long tail
+CAST_SHAPE = 1.6
+POPULARITY = 0.8
+
+# Largest cast a single movie can have
+MAX_CAST = 200
+
+FIRST = ["Al", "Bea", "Cy", "Dee", "Ed", "Flo", "Gus", "Hal", "Ida", "Jo",
+         "Kit", "Lou", "Max", "Nan", "Oz", "Pat", "Ray", "Sue", "Ty", "Vi"]
+LAST = ["Adams", "Baker", "Clark", "Diaz", "Evans", "Ford", "Green",
+        "Hill", "Irwin", "Jones", "King", "Lopez", "Moore", "Nash", "Owen",
+        "Price", "Quinn", "Reed", "Stone", "Turner", "Vance", "West"]
+
+
+def generate(directory, stars, seed=0):
+    """
+    Writes people.csv, movies.csv and stars.csv to `directory`, with
+    about `stars` stars rows, power-law cast sizes and a power-law
+    spread of how many movies each person is in.
+    """
+    rng = random.Random(seed)
+    people_count = max(1, stars // ROWS_PER_PERSON)
+    movie_count = max(1, stars // ROWS_PER_MOVIE)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(people_count):
+            writer.writerow([person + 1, person_name(rng, person),
+                             rng.randint(1900, 2010)])
+
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for movie in range(movie_count):
+            writer.writerow([movie + 1, f"Movie {movie + 1}",
+                             rng.randint(1920, 2020)])
+
+    # Shuffle ids so popularity does not follow id order
+    ids = list(range(1, people_count + 1))
+    rng.shuffle(ids)
+    weights = itertools.accumulate(
+        1 / (rank + 1) ** POPULARITY for rank in range(people_count)
+    )
+    weights = list(weights)
+
+    with open(os.path.join(directory, "stars.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        written = 0
+        for movie in itertools.cycle(range(1, movie_count + 1)):
+            if written >= stars:
+                break
+            size = min(MAX_CAST, stars - written, cast_size(rng))
+            cast = set(rng.choices(ids, cum_weights=weights, k=size))
+            writer.writerows((person_id, movie) for person_id in cast)
+            written += len(cast)
+
+
+def cast_size(rng):
+    """
+    Returns a Pareto-distributed cast size, averaging
+    roughly ROWS_PER_MOVIE stars.
+    """
+    scale = ROWS_PER_MOVIE * (CAST_SHAPE - 1) / CAST_SHAPE
+    return max(1, int(scale * rng.paretovariate(CAST_SHAPE)))
+
+
+def person_name(rng, person):
+    """
+    Returns a name for a person; common names repeat, so some
+    lookups are ambiguous as in the real data.
+    """
+    name = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+    if rng.random() < 0.9:
+        name += f" {person}"
+    return name
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write a synthetic IMDB-like dataset for degrees.py."
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--stars", type=int, default=10 ** 5,
+                        help="number of stars rows (default: 100000)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate(args.directory, args.stars, args.seed)
+
+
+if __name__ == "__main__":
+    main()
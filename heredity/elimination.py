@@ -0,0 +1,233 @@
+import heapq
+import itertools
+
+# Values a person's gene count can take
+GENES = (0, 1, 2)
+
+
+class Factor():
+    """
+    A table over the gene counts of some people, mapping each
+    assignment of `variables`, in order, to a nonnegative weight.
+    """
+
+    def __init__(self, variables, table):
+        self.variables = variables
+        self.table = table
+
+    def multiply(self, other):
+        """
+        Returns the product of two factors, over the union of their people.
+        """
+        variables = self.variables + tuple(
+            person for person in other.variables
+            if person not in self.variables
+        )
+        mine = [variables.index(person) for person in self.variables]
+        theirs = [variables.index(person) for person in other.variables]
+        table = {}
+        for assignment in itertools.product(GENES, repeat=len(variables)):
+            table[assignment] = (
+                self.table[tuple(assignment[i] for i in mine)] *
+                other.table[tuple(assignment[i] for i in theirs)]
+            )
+        return Factor(variables, table)
+
+    def sum_out(self, person):
+        """
+        Returns the factor left after summing over a person's genes.
+        """
+        i = self.variables.index(person)
+        table = {}
+        for assignment, p in self.table.items():
+            rest = assignment[:i] + assignment[i + 1:]
+            table[rest] = table.get(rest, 0) + p
+        return Factor(self.variables[:i] + self.variables[i + 1:], table)
+
+    def scaled(self):
+        """
+        Returns the factor rescaled to sum to 1, which leaves every
+        marginal unchanged but keeps long products from underflowing.
+        """
+        total = sum(self.table.values())
+        return Factor(self.variables, {
+            assignment: p / total for assignment, p in self.table.items()
+        })
+
+    def project(self, people):
+        """
+        Returns the factor left after summing over everyone but `people`.
+        """
+        factor = self
+        for person in self.variables:
+            if person not in people:
+                factor = factor.sum_out(person)
+        return factor
+
+
+def infer(people, probs):
+    """
+    Returns the gene and trait marginals of every person in `people`,
+    shaped and normalized like heredity's `probabilities`, by
+    variable elimination over the pedigree.
+
+    Only gene counts are variables. A known trait enters as evidence on
+    its owner's genes, and an unknown trait has no children, so its
+    marginal follows from the owner's gene marginal.
+    """
+    marginals = gene_marginals(pedigree_factors(people, probs))
+    probabilities = {}
+    for person in people:
+        genes = marginals[person]
+        trait = people[person]["trait"]
+        if trait is None:
+            has_trait = sum(
+                genes[g] * probs["trait"][g][True] for g in GENES
+            )
+        else:
+            has_trait = 1 if trait else 0
+        probabilities[person] = {
+            "gene": {2: genes[2], 1: genes[1], 0: genes[0]},
+            "trait": {True: has_trait, False: 1 - has_trait}
+        }
+    return probabilities
+
+
+def pedigree_factors(people, probs):
+    """
+    Returns the factors of the pedigree: each person's genes given
+    their parents' (or the prior, for founders), and the likelihood
+    of each known trait given its owner's genes.
+    """
+    factors = []
+    for person, data in people.items():
+        if data["mother"] or data["father"]:
+            parents = (data["mother"], data["father"])
+            factors.append(Factor(
+                (person,) + parents,
+                {
+                    (g, mother, father): inheritance(probs, g, mother, father)
+                    for g, mother, father in itertools.product(GENES, repeat=3)
+                }
+            ))
+        else:
+            factors.append(Factor(
+                (person,), {(g,): probs["gene"][g] for g in GENES}
+            ))
+        if data["trait"] is not None:
+            factors.append(Factor(
+                (person,),
+                {(g,): probs["trait"][g][data["trait"]] for g in GENES}
+            ))
+    return factors
+
+
+def inheritance(probs, genes, mother, father):
+    """
+    Returns the probability that a child has `genes` copies of the
+    gene, given the gene counts of their mother and father.
+    """
+    mutation = probs["mutation"]
+    passes = {0: mutation, 1: 0.5, 2: 1 - mutation}
+    from_mother = passes[mother]
+    from_father = passes[father]
+    if genes == 0:
+        return (1 - from_mother) * (1 - from_father)
+    if genes == 1:
+        return (from_mother * (1 - from_father) +
+                from_father * (1 - from_mother))
+    return from_mother * from_father
+
+
+def gene_marginals(factors):
+    """
+    Returns {person: {gene count: probability}} given all the evidence,
+    by sum-product message passing over a junction tree.
+
+    The tree comes from eliminating people in min-neighbour order: each
+    person's clique holds them and their neighbours when eliminated,
+    and hangs below the clique of the first of those neighbours to go.
+    One pass up and one pass down the tree then calibrate every clique,
+    so all marginals cost about as much as a single elimination.
+    """
+    order, cliques = elimination_order(factors)
+    position = {person: i for i, person in enumerate(order)}
+    parent = {}
+    children = {person: [] for person in order}
+    for person in order:
+        separator = cliques[person] - {person}
+        if separator:
+            parent[person] = min(separator, key=position.get)
+            children[parent[person]].append(person)
+
+    # Each factor goes to the clique of its first eliminated person
+    potentials = {person: Factor((person,), dict.fromkeys(
+        ((g,) for g in GENES), 1
+    )) for person in order}
+    for factor in factors:
+        if factor.variables:
+            owner = min(factor.variables, key=position.get)
+            potentials[owner] = potentials[owner].multiply(factor)
+
+    up = {}
+    for person in order:
+        belief = potentials[person]
+        for child in children[person]:
+            belief = belief.multiply(up[child])
+        if person in parent:
+            up[person] = belief.project(cliques[person] - {person}).scaled()
+
+    down = {}
+    marginals = {}
+    for person in reversed(order):
+        incoming = [up[child] for child in children[person]]
+        if person in parent:
+            incoming.append(down[person])
+        belief = potentials[person]
+        for message in incoming:
+            belief = belief.multiply(message)
+        genes = belief.project({person})
+        total = sum(genes.table.values())
+        marginals[person] = {g: genes.table[(g,)] / total for g in GENES}
+
+        for child in children[person]:
+            message = potentials[person]
+            for other in incoming:
+                if other is not up[child]:
+                    message = message.multiply(other)
+            down[child] = message.project(cliques[child] - {child}).scaled()
+    return marginals
+
+
+def elimination_order(factors):
+    """
+    Returns (order, cliques): the people of `factors` in the order they
+    are eliminated, always taking the one with the fewest neighbours,
+    ties broken by name, and each person's clique at elimination.
+    """
+    neighbors = {}
+    for factor in factors:
+        for person in factor.variables:
+            neighbors.setdefault(person, set()).update(factor.variables)
+    for person in neighbors:
+        neighbors[person].discard(person)
+
+    # Entries go stale as degrees change; a stale entry is skipped
+    heap = [(len(others), person) for person, others in neighbors.items()]
+    heapq.heapify(heap)
+    order = []
+    cliques = {}
+    while heap:
+        degree, person = heapq.heappop(heap)
+        if person not in neighbors or degree != len(neighbors[person]):
+            continue
+        order.append(person)
+        cliques[person] = neighbors[person] | {person}
+
+        # Eliminating a person links all of their neighbours
+        for other in neighbors[person]:
+            neighbors[other].discard(person)
+            neighbors[other].update(neighbors[person] - {other})
+            heapq.heappush(heap, (len(neighbors[other]), other))
+        del neighbors[person]
+    return order, cliques
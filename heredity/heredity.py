@@ -1,8 +1,14 @@
+import argparse
 import csv
 import itertools
-import sys
 import copy
 
+import elimination
+import parallel
+import pruned
+import sampling
+import vectorized
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -39,11 +45,63 @@ PROBS = {
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Infer gene and trait probabilities in a family."
+    )
+    parser.add_argument("data", help="CSV file of name, mother, father, trait")
+    parser.add_argument(
+        "--engine", choices=sorted(ENGINES.keys() | SAMPLERS.keys()),
+        default="enumerate",
+        help="inference engine (default: enumerate)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="number of worker processes for the parallel engine "
+             "(default: all CPUs)"
+    )
+    parser.add_argument(
+        "--samples", type=int, default=sampling.SAMPLES,
+        help="samples drawn, or Gibbs sweeps made, by the likelihood and "
+             f"gibbs engines (default: {sampling.SAMPLES})"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None,
+        help="random seed for the likelihood and gibbs engines"
+    )
+    args = parser.parse_args()
+    if args.samples < 1:
+        parser.error("--samples must be at least 1")
+    people = load_data(args.data)
+
+    errors = None
+    if args.engine == "parallel":
+        probabilities = parallel_probabilities(people, args.workers)
+    elif args.engine in SAMPLERS:
+        probabilities, errors = SAMPLERS[args.engine](
+            people, args.samples, args.seed
+        )
+    else:
+        probabilities = ENGINES[args.engine](people)
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                if errors is None:
+                    print(f"    {value}: {p:.4f}")
+                else:
+                    error = errors[person][field][value]
+                    print(f"    {value}: {p:.4f} +/- {error:.4f}")
+
 
-    # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
-    people = load_data(sys.argv[1])
+def enumerate_probabilities(people):
+    """
+    Return the normalized gene and trait probabilities of every person
+    by summing the joint probability of every possible assignment.
+    """
 
     # Keep track of gene and trait probabilities for each person
     probabilities = {
@@ -84,15 +142,57 @@ def main():
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
+    return probabilities
+
+
+def eliminate_probabilities(people):
+    """
+    Return the same probabilities as enumerate_probabilities by
+    variable elimination, in time polynomial in the family size for
+    tree-like pedigrees.
+    """
+    return elimination.infer(people, PROBS)
 
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+
+def prune_probabilities(people):
+    """
+    Return the same probabilities as enumerate_probabilities, still by
+    enumeration, but skipping assignments that contradict the known
+    traits and building each joint probability incrementally.
+    """
+    return pruned.infer(people, PROBS)
+
+
+def parallel_probabilities(people, workers=None):
+    """
+    Return the same probabilities as prune_probabilities, with the
+    enumeration sharded across `workers` processes.
+    """
+    return parallel.infer(people, PROBS, workers)
+
+
+def vectorize_probabilities(people):
+    """
+    Return the same probabilities as enumerate_probabilities by scoring
+    large blocks of integer-coded assignments at once with NumPy.
+    """
+    return vectorized.infer(people, PROBS)
+
+
+def likelihood_probabilities(people, samples=sampling.SAMPLES, seed=None):
+    """
+    Return estimated probabilities and their standard errors from
+    `samples` draws of likelihood weighting.
+    """
+    return sampling.likelihood_weighting(people, PROBS, samples, seed)
+
+
+def gibbs_probabilities(people, samples=sampling.SAMPLES, seed=None):
+    """
+    Return estimated probabilities and their standard errors from
+    `samples` sweeps of Gibbs sampling over everyone's genes.
+    """
+    return sampling.gibbs(people, PROBS, samples, seed)
 
 
 def load_data(filename):
@@ -219,5 +319,21 @@ def normalize(probabilities):
         probabilities[person]['trait'] = newTrait
 
 
+# Inference engines by name, each mapping loaded people to probabilities
+ENGINES = {
+    "enumerate": enumerate_probabilities,
+    "elimination": eliminate_probabilities,
+    "pruned": prune_probabilities,
+    "numpy": vectorize_probabilities,
+    "parallel": parallel_probabilities
+}
+
+# Engines that estimate by sampling, returning standard errors as well
+SAMPLERS = {
+    "likelihood": likelihood_probabilities,
+    "gibbs": gibbs_probabilities
+}
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,66 @@
+import itertools
+import math
+import multiprocessing
+import os
+
+import pruned
+from elimination import GENES
+
+# Shards handed out per worker, so uneven progress evens out
+SHARDS_PER_WORKER = 4
+
+# Set in each worker process by `init`
+family = None
+family_probs = None
+order = None
+
+
+def infer(people, probs, workers=None):
+    """
+    Returns the same probabilities as pruned.infer, with the
+    enumeration split across `workers` processes.
+
+    Assignments are sharded by the gene counts of the first people in
+    family order. Every shard covers the same number of assignments;
+    each worker returns only its shard's unnormalized totals, which
+    are summed here and then normalized.
+    """
+    workers = workers or os.cpu_count() or 1
+    family_order = pruned.family_order(people)
+    depth = min(
+        len(family_order),
+        math.ceil(math.log(workers * SHARDS_PER_WORKER, len(GENES)))
+    )
+    prefixes = itertools.product(GENES, repeat=depth)
+
+    gene_totals = [[0, 0, 0] for _ in family_order]
+    trait_totals = [[0, 0] for _ in family_order]
+    context = multiprocessing.get_context(
+        "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+    )
+    initargs = (people, probs, family_order)
+    with context.Pool(workers, init, initargs) as pool:
+        for genes, traits in pool.imap_unordered(shard, prefixes):
+            for total, part in zip(gene_totals + trait_totals,
+                                   genes + traits):
+                for value, p in enumerate(part):
+                    total[value] += p
+    return pruned.marginals(family_order, gene_totals, trait_totals)
+
+
+def init(people, probs, family_order):
+    """
+    Stores the family shared by every shard of a worker.
+    """
+    global family, family_probs, order
+    family = people
+    family_probs = probs
+    order = family_order
+
+
+def shard(prefix):
+    """
+    Returns the unnormalized totals of the assignments starting with
+    the gene counts in `prefix`.
+    """
+    return pruned.totals(family, family_probs, order, prefix)
@@ -0,0 +1,117 @@
+import itertools
+
+from elimination import GENES, inheritance
+
+
+def infer(people, probs):
+    """
+    Returns the gene and trait marginals of every person in `people`,
+    shaped and normalized like heredity's `probabilities`, by the same
+    exhaustive enumeration as heredity.enumerate_probabilities.
+
+    People are assigned depth first, parents before children, carrying
+    the partial joint probability down, so each assignment costs one
+    multiplication per person rather than a full joint_probability.
+    Known traits are fixed rather than branched on, so no assignment
+    that contradicts the evidence is generated.
+    """
+    order = family_order(people)
+    gene_totals, trait_totals = totals(people, probs, order)
+    return marginals(order, gene_totals, trait_totals)
+
+
+def totals(people, probs, order, prefix=()):
+    """
+    Returns (gene_totals, trait_totals): for each person in `order`,
+    the unnormalized sums of the joint probability by gene count and
+    by trait (False, True), over the assignments in which the first
+    people of `order` have the gene counts in `prefix`.
+    """
+    index = {person: i for i, person in enumerate(order)}
+    parents = [
+        (index[people[person]["mother"]], index[people[person]["father"]])
+        if people[person]["mother"] or people[person]["father"] else None
+        for person in order
+    ]
+    traits = [people[person]["trait"] for person in order]
+    passing = {
+        (mother, father): [inheritance(probs, g, mother, father)
+                           for g in GENES]
+        for mother, father in itertools.product(GENES, repeat=2)
+    }
+
+    # An unknown trait sums to 1 over its values, so it is never
+    # branched on: its share is split by P(trait | genes) at the leaves
+    trait_given = [
+        [probs["trait"][g][False], probs["trait"][g][True]] for g in GENES
+    ]
+
+    gene_totals = [[0, 0, 0] for _ in order]
+    trait_totals = [[0, 0] for _ in order]
+    genes = [0] * len(order)
+
+    def visit(i, p):
+        if i == len(order):
+            for person, g in enumerate(genes):
+                gene_totals[person][g] += p
+                if traits[person] is None:
+                    trait_totals[person][0] += p * trait_given[g][0]
+                    trait_totals[person][1] += p * trait_given[g][1]
+                else:
+                    trait_totals[person][traits[person]] += p
+            return
+        if parents[i] is None:
+            gene_probs = [probs["gene"][g] for g in GENES]
+        else:
+            mother, father = parents[i]
+            gene_probs = passing[genes[mother], genes[father]]
+        for g in GENES if i >= len(prefix) else (prefix[i],):
+            genes[i] = g
+            p_gene = p * gene_probs[g]
+            if traits[i] is not None:
+                p_gene *= probs["trait"][g][traits[i]]
+            visit(i + 1, p_gene)
+
+    visit(0, 1)
+    return gene_totals, trait_totals
+
+
+def marginals(order, gene_totals, trait_totals):
+    """
+    Returns heredity's `probabilities` for the people in `order`,
+    normalizing their gene and trait totals.
+    """
+    probabilities = {}
+    for i, person in enumerate(order):
+        gene_total = gene_totals[i]
+        trait_total = trait_totals[i]
+        probabilities[person] = {
+            "gene": {g: gene_total[g] / sum(gene_total) for g in (2, 1, 0)},
+            "trait": {
+                trait: trait_total[trait] / sum(trait_total)
+                for trait in (True, False)
+            }
+        }
+    return probabilities
+
+
+def family_order(people):
+    """
+    Returns the people in an order where parents come before their
+    children, otherwise keeping the order of `people`.
+    """
+    order = []
+    placed = set()
+
+    def place(person):
+        if person in placed:
+            return
+        placed.add(person)
+        for parent in (people[person]["mother"], people[person]["father"]):
+            if parent:
+                place(parent)
+        order.append(person)
+
+    for person in people:
+        place(person)
+    return order
@@ -0,0 +1,292 @@
+import argparse
+import math
+import random
+
+import elimination
+import pruned
+from elimination import GENES, inheritance
+
+# Gibbs sweeps are grouped into this many batches, whose spread gives
+# the standard error of the estimates
+BATCHES = 20
+
+# Samples drawn, or Gibbs sweeps made, when no budget is given
+SAMPLES = 10000
+
+# Share of the Gibbs sweeps discarded before estimates are recorded
+BURN_IN = 0.1
+
+
+def likelihood_weighting(people, probs, samples, seed=None):
+    """
+    Returns (probabilities, errors) for `people` from `samples` draws
+    of likelihood weighting, shaped like heredity's `probabilities`.
+
+    Genes are drawn parents first, from the prior or from the parents'
+    genes, and each draw is weighted by the probability of the known
+    traits. `errors` holds the standard error of each estimate. Only
+    running sums are kept, so memory does not grow with `samples`.
+    """
+    if samples < 1:
+        raise ValueError("samples must be at least 1")
+    rng = random.Random(seed)
+    family = Family(people, probs)
+
+    # Sums of w, and of w squared, over the draws; for each person,
+    # sums of w * e, w^2 * e and w^2 * e^2 for each of their estimates
+    total = 0
+    total_squares = 0
+    sums = {person: [[0] * 4 for _ in range(3)] for person in family.order}
+    for _ in range(samples):
+        genes = {}
+        weight = 1
+        for person in family.order:
+            genes[person] = choose(rng, family.gene_probs(person, genes))
+            weight *= family.evidence(person, genes[person])
+        total += weight
+        total_squares += weight ** 2
+        for person in family.order:
+            weighted, squared, squared_products = sums[person]
+            for i, value in enumerate(family.estimate(person, genes)):
+                weighted[i] += weight * value
+                squared[i] += weight ** 2 * value
+                squared_products[i] += weight ** 2 * value ** 2
+
+    probabilities = {}
+    errors = {}
+    for person in family.order:
+        probabilities[person], errors[person] = weighted_mean(
+            sums[person], total, total_squares
+        )
+    return probabilities, errors
+
+
+def gibbs(people, probs, samples, seed=None):
+    """
+    Returns (probabilities, errors) for `people` from `samples` sweeps
+    of Gibbs sampling over everyone's genes, shaped like heredity's
+    `probabilities`.
+
+    Each sweep redraws every person's genes given their parents',
+    children's and partners' genes and their known trait. The first
+    BURN_IN of the sweeps are discarded, and the standard errors come
+    from the spread between BATCHES batches of the remaining sweeps.
+    """
+    if samples < 1:
+        raise ValueError("samples must be at least 1")
+    rng = random.Random(seed)
+    family = Family(people, probs)
+    genes = {}
+    for person in family.order:
+        genes[person] = choose(rng, family.gene_probs(person, genes))
+
+    burn_in = int(samples * BURN_IN)
+    kept = samples - burn_in
+    batches = max(1, min(BATCHES, kept))
+    sums = {person: [[0] * 4 for _ in range(batches)]
+            for person in family.order}
+    counts = [0] * batches
+    for sweep in range(samples):
+        batch = (sweep - burn_in) * batches // kept
+        if sweep >= burn_in:
+            counts[batch] += 1
+        for person in family.order:
+            conditional = family.conditional(person, genes)
+            genes[person] = choose(rng, conditional)
+            if sweep < burn_in:
+                continue
+
+            # Averaging the conditional rather than the draw lowers the
+            # variance at no extra cost (Rao-Blackwellization)
+            estimate = family.estimate(person, genes, conditional)
+            for i, value in enumerate(estimate):
+                sums[person][batch][i] += value
+
+    probabilities = {}
+    errors = {}
+    for person in family.order:
+        means = [
+            [value / count for value in row]
+            for row, count in zip(sums[person], counts)
+        ]
+        probabilities[person], errors[person] = batch_mean(means)
+    return probabilities, errors
+
+
+class Family():
+    """
+    The conditional probability tables of a pedigree, looked up by
+    person: genes given parents, known traits given genes, and each
+    person's children.
+    """
+
+    def __init__(self, people, probs):
+        self.people = people
+        self.probs = probs
+        self.order = pruned.family_order(people)
+        self.children = {person: [] for person in people}
+        for person, data in people.items():
+            for parent in (data["mother"], data["father"]):
+                if parent:
+                    self.children[parent].append(person)
+
+    def gene_probs(self, person, genes):
+        """
+        Returns P(g | parents' genes) for each g, or the prior for a
+        founder.
+        """
+        mother = self.people[person]["mother"]
+        father = self.people[person]["father"]
+        if not (mother or father):
+            return [self.probs["gene"][g] for g in GENES]
+        return [
+            inheritance(self.probs, g, genes[mother], genes[father])
+            for g in GENES
+        ]
+
+    def evidence(self, person, g):
+        """
+        Returns the probability of the person's known trait given `g`
+        genes, or 1 if the trait is unknown.
+        """
+        trait = self.people[person]["trait"]
+        if trait is None:
+            return 1
+        return self.probs["trait"][g][trait]
+
+    def conditional(self, person, genes):
+        """
+        Returns the distribution of the person's genes given everyone
+        else's genes and the person's known trait.
+        """
+        weights = self.gene_probs(person, genes)
+        for g in GENES:
+            weights[g] *= self.evidence(person, g)
+            for child in self.children[person]:
+                mother = self.people[child]["mother"]
+                father = self.people[child]["father"]
+                weights[g] *= inheritance(
+                    self.probs, genes[child],
+                    g if mother == person else genes[mother],
+                    g if father == person else genes[father]
+                )
+        total = sum(weights)
+        return [weight / total for weight in weights]
+
+    def estimate(self, person, genes, distribution=None):
+        """
+        Returns the values averaged into a person's marginals: the
+        probability of each gene count, 2, 1, 0, then of having the
+        trait. Without a gene `distribution`, the drawn genes count as
+        certain; an unknown trait is averaged over the genes.
+        """
+        if distribution is None:
+            distribution = [1 if g == genes[person] else 0 for g in GENES]
+        trait = self.people[person]["trait"]
+        if trait is None:
+            has_trait = sum(
+                distribution[g] * self.probs["trait"][g][True] for g in GENES
+            )
+        else:
+            has_trait = 1 if trait else 0
+        return [distribution[2], distribution[1], distribution[0], has_trait]
+
+
+def choose(rng, distribution):
+    """
+    Returns a gene count drawn from `distribution`, which sums to 1.
+    """
+    return rng.choices(GENES, weights=distribution)[0]
+
+
+def weighted_mean(sums, total, total_squares):
+    """
+    Returns the marginals and standard errors of the self-normalized
+    weighted mean of a person's estimates, from the running `sums` of
+    likelihood_weighting and the sums of the weights and their squares.
+    """
+    weighted, squared, squared_products = sums
+    means = [value / total for value in weighted]
+
+    # The sum of (w * (e - mean))^2, expanded into the running sums
+    errors = [
+        math.sqrt(max(0, squared_products[i] - 2 * means[i] * squared[i] +
+                      means[i] ** 2 * total_squares)) / total
+        for i in range(4)
+    ]
+    return shaped(means), shaped(errors, errors=True)
+
+
+def batch_mean(means):
+    """
+    Returns the marginals and standard errors from per-batch means.
+    """
+    count = len(means)
+    overall = [sum(row[i] for row in means) / count for i in range(4)]
+    if count < 2:
+        return shaped(overall), shaped([math.inf] * 4, errors=True)
+    errors = [
+        math.sqrt(sum((row[i] - overall[i]) ** 2 for row in means) /
+                  (count - 1) / count)
+        for i in range(4)
+    ]
+    return shaped(overall), shaped(errors, errors=True)
+
+
+def shaped(values, errors=False):
+    """
+    Returns [gene 2, gene 1, gene 0, trait] values shaped like one
+    person's entry of heredity's `probabilities`. Not having the trait
+    gets the complement of the trait probability, or the same standard
+    error if the values are `errors`.
+    """
+    has_trait = values[3]
+    lacks_trait = has_trait if errors else 1 - has_trait
+    return {
+        "gene": {2: values[0], 1: values[1], 0: values[2]},
+        "trait": {True: has_trait, False: lacks_trait}
+    }
+
+
+SAMPLERS = {"likelihood": likelihood_weighting, "gibbs": gibbs}
+
+
+def main():
+    """
+    Compares both samplers against exact inference on each data file,
+    printing the largest error and the largest error in standard errors.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("data", nargs="+")
+    parser.add_argument("--samples", type=int, default=SAMPLES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.samples < 1:
+        parser.error("--samples must be at least 1")
+
+    # Imported here since heredity imports this module
+    from heredity import PROBS, load_data
+    for path in args.data:
+        people = load_data(path)
+        exact = elimination.infer(people, PROBS)
+        for name, sampler in SAMPLERS.items():
+            probabilities, errors = sampler(
+                people, PROBS, args.samples, args.seed
+            )
+            worst = 0
+            worst_z = 0
+            for person in people:
+                for field in probabilities[person]:
+                    for value in probabilities[person][field]:
+                        error = abs(probabilities[person][field][value] -
+                                    exact[person][field][value])
+                        se = errors[person][field][value]
+                        worst = max(worst, error)
+                        if se:
+                            worst_z = max(worst_z, error / se)
+            print(f"{path} {name}: max error {worst:.4f}, "
+                  f"max {worst_z:.2f} standard errors")
+
+
+if __name__ == "__main__":
+    main()
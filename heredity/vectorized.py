@@ -0,0 +1,107 @@
+import itertools
+
+import numpy as np
+
+from elimination import GENES, inheritance
+
+# Assignments evaluated together in one block
+BLOCK = 1 << 16
+
+
+class Tables():
+    """
+    Lookup tables for a family, indexed by integer-coded assignments.
+
+    `prior[g]` is the probability a founder has `g` genes,
+    `passing[m, f, g]` that a child of parents with `m` and `f` genes
+    has `g`, and `trait[g, t]` that someone with `g` genes has the
+    trait (t = 1) or not (t = 0). `parents[i]` holds the column
+    numbers of person i's mother and father, or None for founders.
+    """
+
+    def __init__(self, people, probs):
+        self.people = list(people)
+        index = {person: i for i, person in enumerate(self.people)}
+        self.parents = [
+            (index[people[person]["mother"]], index[people[person]["father"]])
+            if people[person]["mother"] or people[person]["father"] else None
+            for person in self.people
+        ]
+        self.prior = np.array([probs["gene"][g] for g in GENES])
+        self.passing = np.empty((3, 3, 3))
+        for mother, father, g in itertools.product(GENES, repeat=3):
+            self.passing[mother, father, g] = inheritance(
+                probs, g, mother, father
+            )
+        self.trait = np.array([
+            [probs["trait"][g][False], probs["trait"][g][True]]
+            for g in GENES
+        ])
+
+
+def joint_probabilities(tables, genes, traits):
+    """
+    Returns the joint probability of each row of assignments, where
+    `genes` and `traits` are (assignments x people) integer arrays of
+    gene counts and of 0/1 traits.
+    """
+    p = np.ones(len(genes))
+    for i, parents in enumerate(tables.parents):
+        if parents is None:
+            p *= tables.prior[genes[:, i]]
+        else:
+            mother, father = parents
+            p *= tables.passing[
+                genes[:, mother], genes[:, father], genes[:, i]
+            ]
+        p *= tables.trait[genes[:, i], traits[:, i]]
+    return p
+
+
+def infer(people, probs, block=BLOCK):
+    """
+    Returns the gene and trait marginals of every person in `people`,
+    shaped and normalized like heredity's `probabilities`, by the same
+    enumeration as heredity.enumerate_probabilities.
+
+    Assignments are numbered, decoded into integer arrays `block` at a
+    time and scored with table lookups. Only traits that are unknown
+    vary; known ones are fixed to the evidence.
+    """
+    tables = Tables(people, probs)
+    n = len(tables.people)
+    known = [people[person]["trait"] for person in tables.people]
+    unknown = [i for i, trait in enumerate(known) if trait is None]
+    fixed = np.array([int(bool(trait)) for trait in known])
+    total = 3 ** n * 2 ** len(unknown)
+
+    gene_places = 3 ** np.arange(n)
+    trait_places = 2 ** np.arange(len(unknown))
+    people_index = np.arange(n)
+    gene_totals = np.zeros((n, 3))
+    trait_totals = np.zeros((n, 2))
+    for start in range(0, total, block):
+        codes = np.arange(start, min(start + block, total), dtype=np.int64)
+        genes = (codes[:, None] % 3 ** n) // gene_places % 3
+        traits = np.tile(fixed, (len(codes), 1))
+        traits[:, unknown] = (codes[:, None] // 3 ** n) // trait_places % 2
+
+        p = joint_probabilities(tables, genes, traits)
+        weights = np.repeat(p, n)
+        np.add.at(gene_totals, (np.tile(people_index, len(codes)),
+                                genes.ravel()), weights)
+        np.add.at(trait_totals, (np.tile(people_index, len(codes)),
+                                 traits.ravel()), weights)
+
+    gene_totals /= gene_totals.sum(axis=1, keepdims=True)
+    trait_totals /= trait_totals.sum(axis=1, keepdims=True)
+    return {
+        person: {
+            "gene": {g: float(gene_totals[i, g]) for g in (2, 1, 0)},
+            "trait": {
+                True: float(trait_totals[i, 1]),
+                False: float(trait_totals[i, 0])
+            }
+        }
+        for i, person in enumerate(tables.people)
+    }
@@ -0,0 +1,154 @@
+import argparse
+import json
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import pagerank
+import synthetic
+from matrix import SOLVERS, Telemetry
+
+# Corpus sizes benchmarked by default
+PAGES = [10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5]
+
+# Largest corpus written out as HTML to time crawl
+HTML_PAGES = 10 ** 4
+
+# Number of top pages compared between the two methods
+TOP = 10
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark crawling and ranking synthetic corpora."
+    )
+    parser.add_argument("--pages", type=int, nargs="+", default=PAGES,
+                        help="corpus sizes to benchmark")
+    parser.add_argument("--kinds", nargs="+", choices=synthetic.KINDS,
+                        default=synthetic.KINDS)
+    parser.add_argument("--links", type=int, default=synthetic.LINKS)
+    parser.add_argument("--samples", type=int, default=10 ** 6)
+    parser.add_argument("--html-pages", type=int, default=HTML_PAGES,
+                        help="largest corpus to write as HTML and crawl")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="FILE",
+                        help="write the results to FILE as JSON")
+    args = parser.parse_args()
+
+    results = {
+        "python": platform.python_version(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "samples": args.samples,
+        "runs": []
+    }
+    for kind in args.kinds:
+        for pages in args.pages:
+            run = benchmark(kind, pages, args)
+            report(run)
+            results["runs"].append(run)
+
+    # Linux reports kilobytes, macOS bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1024 ** 2 if sys.platform == "darwin" else 1024
+    results["peak_rss_mb"] = round(peak / scale, 1)
+    print(f"peak RSS: {results['peak_rss_mb']} MB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def benchmark(kind, pages, args):
+    """
+    Returns the timings and agreement of one synthetic corpus.
+    """
+    run = {"kind": kind, "pages": pages}
+    start = time.perf_counter()
+    corpus = synthetic.graph(pages, kind, args.links, args.seed)
+    run["generate_s"] = elapsed(start)
+    run["links"] = sum(map(len, corpus.values()))
+
+    if pages <= args.html_pages:
+        directory = tempfile.mkdtemp(prefix="pagerank-corpus-")
+        try:
+            synthetic.write(directory, corpus)
+            start = time.perf_counter()
+            crawled = pagerank.crawl(directory, rebuild_cache=True)
+            run["crawl_cold_s"] = elapsed(start)
+            start = time.perf_counter()
+            pagerank.crawl(directory)
+            run["crawl_warm_s"] = elapsed(start)
+            run["crawl_matches"] = crawled == corpus
+        finally:
+            shutil.rmtree(directory)
+
+    start = time.perf_counter()
+    sampled = pagerank.sample_pagerank(
+        corpus, pagerank.DAMPING, args.samples, args.seed
+    )
+    run["sample_s"] = elapsed(start)
+
+    run["iterate"] = {}
+    for solver in SOLVERS:
+        telemetry = Telemetry()
+        start = time.perf_counter()
+        iterated = pagerank.iterate_pagerank(
+            corpus, pagerank.DAMPING, solver=solver, telemetry=telemetry
+        )
+        run["iterate"][solver] = {
+            "total_s": elapsed(start),
+            "solve_s": round(sum(telemetry.times), 4),
+            "iterations": telemetry.iterations
+        }
+        if solver == "power":
+            run["agreement"] = agreement(sampled, iterated)
+    return run
+
+
+def agreement(sampled, iterated):
+    """
+    Returns how closely the sampled ranks match the iterated ones.
+    """
+    errors = [abs(sampled[page] - iterated[page]) for page in iterated]
+    top_sampled = set(sorted(sampled, key=sampled.get, reverse=True)[:TOP])
+    top_iterated = set(
+        sorted(iterated, key=iterated.get, reverse=True)[:TOP]
+    )
+    return {
+        "l1": round(sum(errors), 6),
+        "max_abs": round(max(errors), 6),
+        f"top{TOP}_overlap": len(top_sampled & top_iterated) /
+        max(1, len(top_iterated))
+    }
+
+
+def elapsed(start):
+    """
+    Returns the seconds since `start`, a time.perf_counter() value.
+    """
+    return round(time.perf_counter() - start, 4)
+
+
+def report(run):
+    """
+    Prints a short human-readable summary of one run.
+    """
+    print(f"{run['kind']} ({run['pages']} pages, {run['links']} links):")
+    if "crawl_cold_s" in run:
+        print(f"  crawl: {run['crawl_cold_s']:.3f} s cold, "
+              f"{run['crawl_warm_s']:.3f} s cached")
+    print(f"  sample_pagerank: {run['sample_s']:.3f} s")
+    for solver, stats in run["iterate"].items():
+        print(f"  iterate_pagerank ({solver}): {stats['total_s']:.3f} s, "
+              f"{stats['iterations']} iterations")
+    agree = run["agreement"]
+    print(f"  agreement: L1 {agree['l1']:.4f}, "
+          f"max {agree['max_abs']:.4f}, "
+          f"top {TOP} overlap {agree[f'top{TOP}_overlap']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import concurrent.futures
+import itertools
+import mmap
+import json
+import os
+import re
+
+# Directory, inside the corpus directory, where the link cache is written
+CACHE_DIR = ".pagerank-cache"
+
+# Bump whenever the cache layout changes
+VERSION = 2
+
+LINK = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Files of at least this many bytes are memory-mapped instead of read
+MMAP_SIZE = 1 << 20
+
+# Number of files parsed by one task of the thread pool
+CHUNKSIZE = 256
+
+
+def crawl(directory, workers=None, rebuild_cache=False):
+    """
+    Returns a dict mapping each .html file of `directory` to the set of
+    other pages in the corpus it links to.
+
+    Files are read and parsed by a pool of `workers` threads. The links
+    found in each file are cached along with its modification time and
+    size, so a later crawl only re-parses the files that changed, unless
+    `rebuild_cache` is set.
+    """
+    cached = {} if rebuild_cache else load(directory)
+    found = {}
+    stale = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".html") or not entry.is_file():
+                continue
+            stat = entry.stat()
+            key = [stat.st_mtime_ns, stat.st_size]
+            if entry.name in cached and cached[entry.name][0] == key:
+                found[entry.name] = cached[entry.name]
+            else:
+                stale.append((entry.name, key))
+
+    if stale:
+        paths = [os.path.join(directory, name) for name, _ in stale]
+        chunks = [
+            paths[i:i + CHUNKSIZE] for i in range(0, len(paths), CHUNKSIZE)
+        ]
+        with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+            parsed = itertools.chain.from_iterable(
+                pool.map(parse_all, chunks)
+            )
+            for (name, key), links in zip(stale, parsed):
+                found[name] = (key, links)
+    if stale or len(found) != len(cached):
+        save(directory, found)
+
+    # Only include links to other pages in the corpus
+    names = set(found)
+    pages = {}
+    for name, (_, links) in found.items():
+        pages[name] = names.intersection(links)
+        pages[name].discard(name)
+    return pages
+
+
+def parse_all(paths):
+    """
+    Returns the links of each HTML file in `paths`, in order.
+    """
+    return [parse(path) for path in paths]
+
+
+def parse(path):
+    """
+    Returns the frozenset of link targets in the HTML file at `path`.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_SIZE:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                links = LINK.findall(m)
+        else:
+            links = LINK.findall(f.read())
+    # Decode the way os.scandir decodes filenames, so links compare equal
+    return frozenset(map(os.fsdecode, links))
+
+
+def load(directory):
+    """
+    Returns the cached {filename: ([mtime, size], links)} of `directory`,
+    or an empty dict if there is no usable cache.
+
+    The cache is stored as JSON, {filename: [mtime, size, [links]]},
+    so a corpus directory from elsewhere can hold no code to run.
+    """
+    path = os.path.join(directory, CACHE_DIR, "links.json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache["version"] != VERSION:
+            return {}
+        return {
+            name: ([mtime, size], frozenset(links))
+            for name, (mtime, size, links) in cache["pages"].items()
+        }
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return {}
+
+
+def save(directory, pages):
+    """
+    Writes the link cache of `directory`; failures are ignored, so
+    read-only corpora can still be crawled.
+    """
+    path = os.path.join(directory, CACHE_DIR)
+    temporary = os.path.join(path, f"links.json.{os.getpid()}")
+    cache = {
+        "version": VERSION,
+        "pages": {
+            name: [mtime, size, sorted(links)]
+            for name, ([mtime, size], links) in pages.items()
+        }
+    }
+    try:
+        os.makedirs(path, exist_ok=True)
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        # Replaced atomically, so readers never see a partial cache
+        os.replace(temporary, os.path.join(path, "links.json"))
+    except OSError:
+        pass
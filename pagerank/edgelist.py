@@ -0,0 +1,251 @@
+import argparse
+import concurrent.futures
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import crawler
+from matrix import LinkMatrix, power_iteration, residual
+
+# Bump whenever the on-disk layout changes
+VERSION = 1
+
+# Each edge is a (source, target) pair of page numbers
+EDGE = np.dtype([("source", "<u4"), ("target", "<u4")])
+
+# Default bytes of edge data held in memory at a time while ranking
+MEMORY_CAP = 64 << 20
+
+# Bytes in flight per streamed edge: the edge itself, its source and
+# target widened to native ints, and the rank share it carries
+BYTES_PER_EDGE = EDGE.itemsize + 3 * 8
+
+
+def write(path, pages, links):
+    """
+    Writes an edge list to the directory `path`, given the names of the
+    `pages` and, in page order, an iterable over each page's array of
+    linked page numbers. Edges are written sorted by source, one page's
+    links at a time, so the whole graph is never held in memory.
+    """
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "pages.txt"), "w", encoding="utf-8") as f:
+        for page in pages:
+            f.write(page + "\n")
+
+    edges = 0
+    with open(os.path.join(path, "edges.bin"), "wb") as f:
+        for source, targets in enumerate(links):
+            block = np.empty(len(targets), dtype=EDGE)
+            block["source"] = source
+            block["target"] = targets
+            f.write(block.tobytes())
+            edges += len(block)
+
+    # Written last, so an interrupted edge list is never valid
+    manifest = {"version": VERSION, "pages": len(pages), "edges": edges}
+    with open(os.path.join(path, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+
+
+def write_crawl(directory, path, workers=None):
+    """
+    Crawls the .html files of `directory` like crawler.crawl, but
+    streams the links straight into an edge list at `path`.
+    """
+    pages = sorted(
+        entry.name for entry in os.scandir(directory)
+        if entry.name.endswith(".html") and entry.is_file()
+    )
+    index = {page: i for i, page in enumerate(pages)}
+    paths = [os.path.join(directory, page) for page in pages]
+    chunks = [
+        paths[i:i + crawler.CHUNKSIZE]
+        for i in range(0, len(paths), crawler.CHUNKSIZE)
+    ]
+
+    def targets(source, links):
+        # Only links to other pages in the corpus, as in crawl
+        numbers = (index[link] for link in links if link in index)
+        return sorted(set(numbers) - {source})
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        parsed = itertools.chain.from_iterable(
+            pool.map(crawler.parse_all, chunks)
+        )
+        write(path, pages, (
+            targets(source, links) for source, links in enumerate(parsed)
+        ))
+
+
+def open_edges(path):
+    """
+    Returns (pages, edges): the page count of the edge list at `path`
+    and a read-only memory map of its edges.
+    """
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest["version"] != VERSION:
+        raise ValueError(f"edge list version {manifest['version']} "
+                         f"is not {VERSION}")
+    if manifest["edges"] == 0:
+        return manifest["pages"], np.empty(0, dtype=EDGE)
+    edges = np.memmap(os.path.join(path, "edges.bin"), dtype=EDGE,
+                      mode="r", shape=(manifest["edges"],))
+    return manifest["pages"], edges
+
+
+def iterate(path, damping_factor, tolerance, max_iterations,
+            memory_cap=MEMORY_CAP, norm=1, telemetry=None):
+    """
+    Returns (ranks, iterations) like matrix.power_iteration, for the
+    edge list at `path`.
+
+    Each iteration streams the memory-mapped edges in blocks that need
+    at most `memory_cap` bytes, so only the rank vectors and one block
+    of edges are ever in memory.
+    """
+    n, edges = open_edges(path)
+    block = max(1, memory_cap // BYTES_PER_EDGE)
+    blocks = range(0, len(edges), block)
+
+    outdegree = np.zeros(n, dtype=np.int64)
+    for start in blocks:
+        sources = edges["source"][start:start + block]
+        outdegree += np.bincount(sources, minlength=n)
+    dangling = outdegree == 0
+    scale = 1 / np.maximum(outdegree, 1)
+
+    ranks = np.full(n, 1 / n)
+    iterations = 0
+    while iterations < max_iterations:
+        began = time.perf_counter()
+        shares = ranks * scale
+        new_ranks = np.zeros(n)
+        for start in blocks:
+            chunk = edges[start:start + block]
+            new_ranks += np.bincount(
+                chunk["target"], weights=shares[chunk["source"]], minlength=n
+            )
+        spread = ranks[dangling].sum() / n
+        new_ranks = damping_factor * (new_ranks + spread) + \
+            (1 - damping_factor) / n
+        change = residual(new_ranks - ranks, norm)
+        ranks = new_ranks
+        iterations += 1
+        if telemetry is not None:
+            telemetry(iterations, change, time.perf_counter() - began)
+        if change < tolerance:
+            break
+    return ranks / ranks.sum(), iterations
+
+
+def read_pages(path):
+    """
+    Returns the page names of the edge list at `path`, in page order.
+    """
+    with open(os.path.join(path, "pages.txt"), encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def check(pages, links_per_page, memory_cap, seed=0):
+    """
+    Writes a random graph whose edges take more than `memory_cap`
+    bytes, ranks it from disk under that cap and compares the result
+    with the in-memory solver. Returns a dict describing the run.
+    """
+    rng = np.random.default_rng(seed)
+    degrees = rng.integers(0, 2 * links_per_page + 1, size=pages)
+    names = [f"{page}.html" for page in range(pages)]
+
+    def links():
+        for page in range(pages):
+            targets = rng.integers(pages, size=degrees[page])
+            yield np.unique(targets[targets != page])
+
+    path = tempfile.mkdtemp(prefix="pagerank-edges-")
+    try:
+        write(path, names, links())
+        edge_bytes = os.path.getsize(os.path.join(path, "edges.bin"))
+        if edge_bytes <= memory_cap:
+            raise ValueError("the generated edges fit under memory_cap")
+
+        tracemalloc.start()
+        ranks, iterations = iterate(path, 0.85, 1e-10, 1000, memory_cap)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        _, edges = open_edges(path)
+        counts = np.bincount(edges["source"], minlength=pages)
+        offsets = np.zeros(pages + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        matrix = LinkMatrix(names, offsets, np.asarray(edges["target"]))
+        expected, _ = power_iteration(matrix, 0.85, 1e-10, 1000)
+    finally:
+        shutil.rmtree(path)
+
+    # Besides one block of edges, a few page-sized vectors are live:
+    # the ranks, shares, out-degrees and one block's partial sums
+    allowed = memory_cap + 8 * pages * 8
+    return {
+        "edge_bytes": edge_bytes,
+        "memory_cap": memory_cap,
+        "peak_traced_bytes": peak,
+        "within_cap": peak <= allowed,
+        "iterations": iterations,
+        "l1_error": float(np.abs(ranks - expected).sum())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rank pages from an on-disk edge list."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser(
+        "write", help="crawl a corpus into an edge list"
+    )
+    command.add_argument("corpus")
+    command.add_argument("path")
+
+    command = commands.add_parser("rank", help="rank an edge list")
+    command.add_argument("path")
+    command.add_argument("--top", type=int, default=10)
+    command.add_argument("--memory-cap", type=int, default=MEMORY_CAP,
+                         help="bytes of edges held in memory at a time")
+
+    command = commands.add_parser(
+        "check", help="rank a generated graph larger than --memory-cap"
+    )
+    command.add_argument("--pages", type=int, default=200000)
+    command.add_argument("--links", type=int, default=10,
+                         help="average links per page")
+    command.add_argument("--memory-cap", type=int, default=1 << 20)
+    args = parser.parse_args()
+
+    if args.command == "write":
+        write_crawl(args.corpus, args.path)
+    elif args.command == "rank":
+        ranks, iterations = iterate(
+            args.path, 0.85, 1e-6, 1000, args.memory_cap
+        )
+        pages = read_pages(args.path)
+        print(f"Converged in {iterations} iterations")
+        for page in np.argsort(ranks)[::-1][:args.top].tolist():
+            print(f"  {pages[page]}: {ranks[page]:.4f}")
+    else:
+        result = check(args.pages, args.links, args.memory_cap)
+        print(json.dumps(result, indent=2))
+        if not result["within_cap"] or result["l1_error"] > 1e-8:
+            raise SystemExit("check failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+import functools
+import itertools
+import time
+
+from collections import deque
+
+import numpy as np
+
+from scipy import sparse
+
+# Power iterations between two extrapolations, and the number of most
+# recent iterates an extrapolation looks at
+EXTRAPOLATE_EVERY = 10
+EXTRAPOLATE_HISTORY = 4
+
+# Row blocks updated in turn by each Gauss-Seidel sweep
+GAUSS_SEIDEL_BLOCKS = 64
+
+
+class LinkMatrix():
+    """
+    Link structure of a corpus as a sparse transition matrix.
+
+    Pages are numbered with dense ints in the order of `pages`. The
+    pages linked to by page `i` are `targets[offsets[i]:offsets[i + 1]]`.
+    Entry (p, i) of the CSR matrix `links` is 1 / outdegree[i] when
+    page i links to page p, so `links @ ranks` spreads the rank of each
+    page evenly over its links. `dangling` marks the pages without
+    links, whose rank is spread evenly over every page instead.
+    """
+
+    def __init__(self, pages, offsets, targets):
+        self.pages = pages
+        self.index = {page: i for i, page in enumerate(pages)}
+        self.offsets = offsets
+        self.targets = targets
+        self.outdegree = np.diff(offsets)
+        self.dangling = self.outdegree == 0
+
+        # Column i holds the links of page i; CSR makes the
+        # matrix-vector product a single pass over the rows
+        n = len(pages)
+        weights = np.repeat(
+            1 / np.maximum(self.outdegree, 1), self.outdegree
+        )
+        self.links = sparse.csc_matrix(
+            (weights, targets, offsets), shape=(n, n)
+        ).tocsr()
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Builds the matrix of a corpus, as returned by pagerank.crawl.
+        """
+        pages = list(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        n = len(pages)
+
+        outdegree = np.fromiter(
+            map(len, corpus.values()), dtype=np.int64, count=n
+        )
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(outdegree, out=offsets[1:])
+        targets = np.fromiter(
+            map(index.__getitem__, itertools.chain.from_iterable(
+                corpus.values()
+            )),
+            dtype=np.int64, count=offsets[-1]
+        )
+        return cls(pages, offsets, targets)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def step(self, ranks, damping_factor, teleport=None):
+        """
+        Returns the ranks after one step of the random surfer.
+
+        `ranks` is either a vector or an N x k block of k rank vectors.
+        The surfer jumps uniformly, or by `teleport`, a vector or block
+        of jump distributions shaped like `ranks`, from which surfers on
+        pages without links also restart.
+        """
+        n = len(self.pages)
+        spread = ranks[self.dangling].sum(axis=0)
+        if teleport is None:
+            return damping_factor * (self.links @ ranks + spread / n) + \
+                (1 - damping_factor) / n
+        return damping_factor * (self.links @ ranks) + \
+            (damping_factor * spread + 1 - damping_factor) * teleport
+
+    def from_dict(self, values, default):
+        """
+        Returns an array of the entries of `values` in page order,
+        with `default` for pages missing from it.
+        """
+        return np.fromiter(
+            (values.get(page, default) for page in self.pages),
+            dtype=np.float64, count=len(self.pages)
+        )
+
+    def to_dict(self, ranks):
+        """
+        Returns a dict mapping each page to its entry of `ranks`.
+        """
+        return dict(zip(self.pages, ranks.tolist()))
+
+
+class Telemetry():
+    """
+    Records the residual and duration of every iteration of a solver;
+    pass an instance as the `telemetry` hook of a solver.
+    """
+
+    def __init__(self):
+        self.residuals = []
+        self.times = []
+
+    def __call__(self, iteration, residual, seconds):
+        self.residuals.append(residual)
+        self.times.append(seconds)
+
+    @property
+    def iterations(self):
+        return len(self.residuals)
+
+
+def power_iteration(matrix, damping_factor, tolerance, max_iterations,
+                    ranks=None, teleport=None, norm=1, telemetry=None,
+                    extrapolate=None):
+    """
+    Returns (ranks, iterations): the PageRank vector of `matrix` and
+    the number of steps taken to reach it.
+
+    Iteration starts from `ranks`, or from `teleport` or uniform ranks
+    if None, and stops once the `norm` of the change between two
+    iterations drops below `tolerance`, or after `max_iterations`
+    steps. With an N x k `teleport` block, the k personalized rank
+    vectors are iterated together and returned as a block, sharing
+    each sparse product.
+
+    Every EXTRAPOLATE_EVERY steps, `extrapolate`, if given, replaces
+    the ranks with an estimate of the limit of the recent iterates.
+    `telemetry` is called after every step with the iteration number,
+    the residual and the seconds the step took.
+    """
+    ranks = initial_ranks(matrix, ranks, teleport)
+    history = deque(maxlen=EXTRAPOLATE_HISTORY)
+    iterations = 0
+    while iterations < max_iterations:
+        began = time.perf_counter()
+        new_ranks = matrix.step(ranks, damping_factor, teleport)
+        change = residual(new_ranks - ranks, norm)
+        ranks = new_ranks
+        iterations += 1
+        if extrapolate is not None and change >= tolerance:
+            history.append(ranks)
+            if iterations % EXTRAPOLATE_EVERY == 0 and \
+                    len(history) == EXTRAPOLATE_HISTORY:
+                ranks = extrapolate(history)
+                history.clear()
+        if telemetry is not None:
+            telemetry(iterations, change, time.perf_counter() - began)
+        if change < tolerance:
+            break
+    return ranks / ranks.sum(axis=0), iterations
+
+
+def gauss_seidel(matrix, damping_factor, tolerance, max_iterations,
+                 ranks=None, teleport=None, norm=1, telemetry=None):
+    """
+    Returns (ranks, iterations) like power_iteration, but updates the
+    ranks in place, one block of GAUSS_SEIDEL_BLOCKS rows at a time,
+    so later rows of a sweep already use the new ranks of earlier ones.
+    """
+    n = len(matrix)
+    ranks = initial_ranks(matrix, ranks, teleport).copy()
+    bounds = np.linspace(0, n, min(n, GAUSS_SEIDEL_BLOCKS) + 1).astype(int)
+    blocks = [
+        (start, stop, matrix.links[start:stop])
+        for start, stop in zip(bounds, bounds[1:])
+    ]
+    iterations = 0
+    while iterations < max_iterations:
+        began = time.perf_counter()
+        previous = ranks.copy()
+        spread = ranks[matrix.dangling].sum(axis=0)
+        for start, stop, rows in blocks:
+            if teleport is None:
+                new_ranks = damping_factor * (rows @ ranks + spread / n) + \
+                    (1 - damping_factor) / n
+            else:
+                new_ranks = damping_factor * (rows @ ranks) + \
+                    (damping_factor * spread + 1 - damping_factor) * \
+                    teleport[start:stop]
+            dangling = matrix.dangling[start:stop]
+            spread = spread + \
+                (new_ranks[dangling] - ranks[start:stop][dangling]).sum(axis=0)
+            ranks[start:stop] = new_ranks
+        # In-place sweeps let the total drift, which would otherwise
+        # decay only as slowly as damping_factor ** iterations
+        ranks /= ranks.sum(axis=0)
+        change = residual(ranks - previous, norm)
+        iterations += 1
+        if telemetry is not None:
+            telemetry(iterations, change, time.perf_counter() - began)
+        if change < tolerance:
+            break
+    return ranks / ranks.sum(axis=0), iterations
+
+
+def initial_ranks(matrix, ranks, teleport):
+    """
+    Returns the ranks a solver starts from: `ranks` if given, else the
+    `teleport` distributions, else uniform ranks.
+    """
+    if ranks is not None:
+        return ranks
+    if teleport is not None:
+        return teleport
+    return np.full(len(matrix), 1 / len(matrix))
+
+
+def residual(change, norm):
+    """
+    Returns the `norm` (1, 2 or inf) of a change of ranks, or the
+    largest over the columns of a block.
+    """
+    return float(np.linalg.norm(change, ord=norm, axis=0).max())
+
+
+def aitken(history):
+    """
+    Returns the Aitken delta-squared extrapolation, page by page, of
+    the last three iterates in `history`.
+    """
+    x0, x1, x2 = list(history)[-3:]
+    delta = x2 - x1
+    curvature = delta - (x1 - x0)
+    safe = np.abs(curvature) > 1e-15
+    limit = np.where(
+        safe, x2 - delta * delta / np.where(safe, curvature, 1), x2
+    )
+    # Where the sequence is not yet geometric the estimate can overshoot
+    limit = np.where(limit > 0, limit, x2)
+    return limit / limit.sum(axis=0)
+
+
+def quadratic(history):
+    """
+    Returns the quadratic extrapolation of Kamvar et al. from the last
+    four iterates in `history`, which assumes the error lies mostly in
+    the span of the next two eigenvectors.
+    """
+    iterates = [np.reshape(x, (len(x), -1)) for x in history]
+    x0, x1, x2, x3 = iterates
+    limit = np.empty_like(x3)
+    for column in range(x3.shape[1]):
+        y = np.column_stack([
+            x1[:, column] - x0[:, column], x2[:, column] - x0[:, column]
+        ])
+        gamma = np.linalg.lstsq(
+            y, x0[:, column] - x3[:, column], rcond=None
+        )[0]
+        beta = [gamma[0] + gamma[1] + 1, gamma[1] + 1, 1]
+        limit[:, column] = beta[0] * x1[:, column] + \
+            beta[1] * x2[:, column] + beta[2] * x3[:, column]
+    limit = np.where(limit > 0, limit, x3)
+    limit = limit / limit.sum(axis=0)
+    return limit.reshape(history[-1].shape)
+
+
+# Solvers by name, all called like power_iteration
+SOLVERS = {
+    "power": power_iteration,
+    "gauss-seidel": gauss_seidel,
+    "aitken": functools.partial(power_iteration, extrapolate=aitken),
+    "quadratic": functools.partial(power_iteration, extrapolate=quadratic)
+}
+
+
+def forward_push(matrix, damping_factor, seed, epsilon):
+    """
+    Returns an approximate personalized PageRank for `seed`, a dict
+    mapping page numbers to jump weights that sum to 1, as a dict
+    mapping page numbers to ranks.
+
+    Unspent probability mass is kept as a residual per page and pushed
+    along the links of any page whose residual exceeds `epsilon` times
+    its outdegree. Only pages near the seed are ever touched, so the
+    cost depends on `epsilon` rather than on the size of the corpus.
+    Each rank undershoots by at most its page's final residual.
+    """
+    ranks = {}
+    residual = dict(seed)
+    queue = deque(residual)
+    queued = set(queue)
+    while queue:
+        page = queue.popleft()
+        queued.discard(page)
+        mass = residual.pop(page)
+        ranks[page] = ranks.get(page, 0) + (1 - damping_factor) * mass
+
+        # Surfers on pages without links restart from the seed
+        degree = int(matrix.outdegree[page])
+        if degree:
+            start = matrix.offsets[page]
+            shares = dict.fromkeys(
+                matrix.targets[start:start + degree].tolist(),
+                damping_factor * mass / degree
+            )
+        else:
+            shares = {
+                target: damping_factor * mass * weight
+                for target, weight in seed.items()
+            }
+        for target, share in shares.items():
+            residual[target] = residual.get(target, 0) + share
+            threshold = epsilon * max(1, matrix.outdegree[target])
+            if target not in queued and residual[target] > threshold:
+                queue.append(target)
+                queued.add(target)
+    return ranks
@@ -1,52 +1,95 @@
-import os
-import random
-import re
-import sys
-import copy
+import argparse
+
+import numpy as np
+
+import crawler
+from matrix import (
+    SOLVERS, LinkMatrix, Telemetry, forward_push, power_iteration
+)
+from parallel import sample_parallel
+from sampler import sample_visits
 
 DAMPING = 0.85
 SAMPLES = 10000
 
+# Residual per link below which forward_push stops pushing a page
+PUSH_EPSILON = 1e-7
+
+# Stop iterating once the L1 change between two iterations is below
+# TOLERANCE, or after MAX_ITERATIONS iterations
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 1000
+
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
-    print(f"PageRank Results from Sampling (n = {SAMPLES})")
+    parser = argparse.ArgumentParser(
+        description="Rank the pages of a corpus by sampling and iteration."
+    )
+    parser.add_argument("corpus")
+    parser.add_argument("--samples", type=int, default=SAMPLES,
+                        help=f"number of samples (default: {SAMPLES})")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="sample across this many processes (default: one, in-process)"
+    )
+    parser.add_argument(
+        "--target-error", type=float, default=None, metavar="SE",
+        help="with --workers, stop sampling once every page's standard "
+             "error is at most SE"
+    )
+    parser.add_argument("--solver", choices=sorted(SOLVERS),
+                        default="power")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--norm", choices=["1", "2", "inf"], default="1",
+                        help="norm of the change compared to --tolerance")
+    parser.add_argument(
+        "--rebuild-cache", action="store_true",
+        help="re-parse every file even if the link cache is up to date"
+    )
+    args = parser.parse_args()
+    if args.samples < 1:
+        parser.error("--samples must be at least 1")
+    if args.target_error is not None and args.workers is None:
+        parser.error("--target-error requires --workers")
+
+    corpus = crawl(args.corpus, args.rebuild_cache)
+    if args.workers is None:
+        ranks = sample_pagerank(corpus, DAMPING, args.samples, args.seed)
+        errors = None
+        samples = args.samples
+    else:
+        ranks, errors, samples = parallel_sample_pagerank(
+            corpus, DAMPING, args.samples, args.workers, args.seed,
+            args.target_error
+        )
+    print(f"PageRank Results from Sampling (n = {samples})")
     for page in sorted(ranks):
-        print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
-    print(f"PageRank Results from Iteration")
+        if errors is None:
+            print(f"  {page}: {ranks[page]:.4f}")
+        else:
+            print(f"  {page}: {ranks[page]:.4f} +/- {errors[page]:.4f}")
+    telemetry = Telemetry()
+    ranks = iterate_pagerank(
+        corpus, DAMPING, args.tolerance, solver=args.solver,
+        norm=float(args.norm), telemetry=telemetry
+    )
+    print(f"PageRank Results from Iteration ({telemetry.iterations} "
+          f"iterations, {sum(telemetry.times) * 1000:.1f} ms)")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
 
 
-def crawl(directory):
+def crawl(directory, rebuild_cache=False):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
-    """
-    pages = dict()
-
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
-
-    # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
 
-    return pages
+    Files are parsed concurrently, and the links of unchanged files are
+    reused from the cache of an earlier crawl unless `rebuild_cache`.
+    """
+    return crawler.crawl(directory, rebuild_cache=rebuild_cache)
 
 
 def transition_model(corpus, page, damping_factor):
@@ -72,7 +115,7 @@ def transition_model(corpus, page, damping_factor):
     return probDistribution
 
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, seed=None):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
@@ -80,37 +123,45 @@ def sample_pagerank(corpus, damping_factor, n):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
-    """
-    #First sample
-    visits = {}
-    allNodes = list(corpus.keys())
-    for i in allNodes:
-        visits[i] = 0
 
-    firstPage = random.choice(allNodes)
-    visits[firstPage] = visits[firstPage] + 1
-
-    distributions = transition_model(corpus,firstPage,damping_factor)
-
-    #Next samples
-    while n>1:
-        nextPage = (random.choices(list(distributions.keys()), weights = list(distributions.values()), k=1))[0]
-        visits[nextPage] = visits[nextPage] + 1
-
-        distributions = transition_model(corpus,nextPage,damping_factor)
-
-        n-=1
-
-    #Getting the pagerank value from visits
-    totalVisits = sum(visits.values())
-
-    for i in allNodes:
-        visits[i] = (visits[i]) / (totalVisits)
-
-    return visits
-    
+    `seed` seeds the random number generator, for repeatable samples.
+    """
+    if n < 1:
+        raise ValueError("n must be at least 1")
+    if not corpus:
+        return {}
+    matrix = LinkMatrix.from_corpus(corpus)
+    visits = sample_visits(
+        matrix, damping_factor, n, np.random.default_rng(seed)
+    )
+    return matrix.to_dict(visits / visits.sum())
+
+
+def parallel_sample_pagerank(corpus, damping_factor, n, workers=None,
+                             seed=None, target_error=None):
+    """
+    Return (ranks, errors, samples) from sampling up to about `n` pages
+    across `workers` processes, each batch with its own random stream.
 
-def iterate_pagerank(corpus, damping_factor):
+    `ranks` and `errors` are dictionaries mapping each page to its
+    estimated PageRank value and to the standard error of that value.
+    With `target_error`, sampling stops early once no page's standard
+    error is above it; `samples` counts the samples actually drawn.
+    """
+    if n < 1:
+        raise ValueError("n must be at least 1")
+    if not corpus:
+        return {}, {}, 0
+    matrix = LinkMatrix.from_corpus(corpus)
+    ranks, errors, samples = sample_parallel(
+        matrix, damping_factor, n, workers, seed, target_error
+    )
+    return matrix.to_dict(ranks), matrix.to_dict(errors), samples
+
+
+def iterate_pagerank(corpus, damping_factor,
+                     tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                     solver="power", norm=1, telemetry=None):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -118,48 +169,122 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
-    """
-    allNodes = list(corpus.keys())
-    nAll = len(allNodes)
-
-    probDistribution = {}
-    for i in allNodes:
-        probDistribution[i] = 1/nAll
-
-    maxChange = float('inf')
-
-    while maxChange>0.001:
-
-        newProbDistribution = copy.deepcopy(probDistribution)
-        maxInnerChange = 0
-
-        for p in allNodes:
-
-            newValue = (1 - damping_factor)/nAll
-            sumation = 0
-            
-            for i in allNodes:
 
-                if p in corpus[i]:
-                    sumation += probDistribution[i] / len(corpus[i])
+    A page with no links is treated as linking to every page.
 
-            newValue += damping_factor * sumation
+    `solver` names one of matrix.SOLVERS, and iteration stops once the
+    `norm` (1, 2 or inf) of the change is below `tolerance`. A
+    `telemetry` hook, such as a matrix.Telemetry, is called after every
+    iteration with its number, residual and duration in seconds.
+    """
+    if not corpus:
+        return {}
+    if solver not in SOLVERS:
+        raise ValueError(f"unknown solver: {solver}")
+    matrix = LinkMatrix.from_corpus(corpus)
+    ranks, _ = SOLVERS[solver](
+        matrix, damping_factor, tolerance, max_iterations,
+        norm=norm, telemetry=telemetry
+    )
+    return matrix.to_dict(ranks)
+
+
+def personalized_pagerank(corpus, damping_factor, seeds,
+                          tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Return a list of PageRank dictionaries, one per seed in `seeds`.
 
+    Each seed is a dictionary mapping pages to weights; instead of
+    jumping to a page chosen uniformly, the surfer jumps to one chosen
+    in proportion to the seed's weights. All seeds are iterated
+    together as one block, so each sparse product serves every seed.
+    """
+    if not corpus or not seeds:
+        return [{} for _ in seeds]
+    matrix = LinkMatrix.from_corpus(corpus)
+    teleport = np.column_stack([jump_weights(matrix, seed) for seed in seeds])
+    ranks, _ = power_iteration(
+        matrix, damping_factor, tolerance, max_iterations, teleport=teleport
+    )
+    return [matrix.to_dict(column) for column in ranks.T]
 
-            oldValue = probDistribution[p]
 
-            newProbDistribution[p] = newValue
+def push_pagerank(corpus, damping_factor, seed, epsilon=PUSH_EPSILON):
+    """
+    Return an approximate personalized PageRank dictionary for one
+    `seed`, as in personalized_pagerank, by forward push.
 
-            if abs(newValue-oldValue)>=maxInnerChange:
-                maxInnerChange = abs(newValue-oldValue)
-            
-        if maxInnerChange < maxChange:
-            maxChange = maxInnerChange
+    Only the pages the push reached are included; the others have
+    approximately zero rank. Lower `epsilon` for more accuracy.
+    """
+    if not corpus:
+        return {}
+    matrix = LinkMatrix.from_corpus(corpus)
+    weights = jump_weights(matrix, seed)
+    nonzero = np.flatnonzero(weights)
+    ranks = forward_push(
+        matrix, damping_factor,
+        dict(zip(nonzero.tolist(), weights[nonzero].tolist())), epsilon
+    )
+    return {matrix.pages[page]: rank for page, rank in ranks.items()}
+
+
+def jump_weights(matrix, seed):
+    """
+    Return the seed's weights as a distribution over the pages of
+    `matrix`, ignoring pages outside the corpus.
+    """
+    weights = matrix.from_dict(seed, 0)
+    total = weights.sum()
+    if total <= 0:
+        raise ValueError("seed has no positive weight on a page in the corpus")
+    return weights / total
 
-        probDistribution = newProbDistribution
 
+def update_pagerank(corpus, damping_factor, previous, changed,
+                    tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                    compare_cold=False):
+    """
+    Return (ranks, report) for `corpus` after some of its pages
+    changed, warm-starting the iteration from `previous`, the ranks
+    computed before the change.
+
+    Pages removed from the corpus drop their previous rank, added pages
+    start from an even share and the start is renormalized, so
+    iteration only has to carry the effect of the changes through the
+    graph.
+
+    `changed` holds the pages added, removed or modified since. It is
+    only used for the report and does not affect the ranks. `report`
+    counts the changes of each kind and the iterations taken.
+    With `compare_cold`, the ranks are also computed from a uniform
+    start, and the report adds the iterations that took and how many
+    the warm start saved.
+    """
+    if not corpus:
+        return {}, {"iterations": 0}
+    matrix = LinkMatrix.from_corpus(corpus)
+    start = matrix.from_dict(previous, 1 / len(matrix))
+    ranks, iterations = power_iteration(
+        matrix, damping_factor, tolerance, max_iterations, start / start.sum()
+    )
+    report = {
+        "added": sum(page in corpus and page not in previous
+                     for page in changed),
+        "removed": sum(page not in corpus and page in previous
+                       for page in changed),
+        "modified": sum(page in corpus and page in previous
+                        for page in changed),
+        "iterations": iterations
+    }
+    if compare_cold:
+        _, cold = power_iteration(
+            matrix, damping_factor, tolerance, max_iterations
+        )
+        report["cold_iterations"] = cold
+        report["iterations_saved"] = cold - iterations
+    return matrix.to_dict(ranks), report
 
-    return probDistribution
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,99 @@
+import math
+import multiprocessing
+import os
+
+import numpy as np
+
+from sampler import sample_visits
+
+# Largest number of samples one task draws before its counts are merged
+BATCH = 10 ** 6
+
+# Fewest batches a run is split into, so the spread between
+# batches gives a usable standard error
+MIN_BATCHES = 8
+
+# Set in each worker process by `init`
+matrix = None
+damping_factor = None
+batch_size = None
+
+
+def sample_parallel(link_matrix, damping, n, workers=None, seed=None,
+                    target_error=None):
+    """
+    Returns (ranks, errors, samples) from sampling the random surfer on
+    `link_matrix` across `workers` processes.
+
+    Samples are drawn in equal batches, each from its own RNG stream
+    spawned from `seed`, and the visit counts of every batch are
+    merged. `errors` holds the standard error of each page's rank,
+    estimated from the spread of the per-batch ranks. Sampling stops
+    after about `n` samples or, when `target_error` is given, as soon
+    as no page's standard error exceeds it.
+    """
+    if n < 1:
+        raise ValueError("n must be at least 1")
+    workers = workers or os.cpu_count() or 1
+    size = max(1, min(BATCH, math.ceil(n / MIN_BATCHES)))
+    batches = max(2, math.ceil(n / size))
+    streams = np.random.SeedSequence(seed)
+
+    pages = len(link_matrix)
+    total = np.zeros(pages, dtype=np.int64)
+    rank_sum = np.zeros(pages)
+    rank_squares = np.zeros(pages)
+    done = 0
+
+    context = multiprocessing.get_context(
+        "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+    )
+    initargs = (link_matrix, damping, size)
+    with context.Pool(workers, init, initargs) as pool:
+        while done < batches:
+            seeds = streams.spawn(min(workers, batches - done))
+            for counts in pool.imap_unordered(draw, seeds):
+                total += counts
+                ranks = counts / size
+                rank_sum += ranks
+                rank_squares += ranks * ranks
+                done += 1
+            errors = standard_errors(rank_sum, rank_squares, done)
+            if target_error is not None and errors.max() <= target_error:
+                break
+
+    return total / total.sum(), errors, done * size
+
+
+def init(link_matrix, damping, size):
+    """
+    Stores the sampling parameters shared by every task of a worker.
+    """
+    global matrix, damping_factor, batch_size
+    matrix = link_matrix
+    damping_factor = damping
+    batch_size = size
+
+
+def draw(seed_sequence):
+    """
+    Returns the visit counts of one batch, drawn from `seed_sequence`.
+    """
+    counts = sample_visits(
+        matrix, damping_factor, batch_size,
+        np.random.default_rng(seed_sequence)
+    )
+    # A batch never exceeds BATCH samples, so 32 bits per page suffice
+    return counts.astype(np.uint32)
+
+
+def standard_errors(rank_sum, rank_squares, batches):
+    """
+    Returns the standard error of the mean of `batches` per-batch
+    ranks, given their sum and sum of squares.
+    """
+    if batches < 2:
+        return np.full(len(rank_sum), np.inf)
+    mean = rank_sum / batches
+    variance = (rank_squares - batches * mean * mean) / (batches - 1)
+    return np.sqrt(np.maximum(variance, 0) / batches)
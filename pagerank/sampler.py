@@ -0,0 +1,61 @@
+import numpy as np
+
+# Number of independent surfers advanced together
+WALKERS = 1024
+
+# Steps each surfer takes from its uniform start before its visits are
+# counted; the start's influence decays as damping_factor ** BURN_IN
+BURN_IN = 64
+
+# Visits buffered before being added to the counts
+FLUSH = 1 << 20
+
+
+def sample_visits(matrix, damping_factor, n, rng, walkers=WALKERS):
+    """
+    Returns how often each page of `matrix` was visited, over `n`
+    samples of the random surfer drawn with the NumPy Generator `rng`.
+
+    Up to `walkers` surfers walk at once, so every step draws all of
+    their teleport and link choices in bulk, at O(1) amortized cost per
+    sample whatever the size of the corpus.
+    """
+    pages = len(matrix)
+    counts = np.zeros(pages, dtype=np.int64)
+    walkers = max(1, min(walkers, n))
+    current = rng.integers(pages, size=walkers)
+    for _ in range(BURN_IN):
+        current = advance(matrix, damping_factor, current, rng)
+
+    visited = []
+    buffered = 0
+    remaining = n
+    while remaining > 0:
+        visited.append(current[:remaining])
+        buffered += len(visited[-1])
+        remaining -= len(visited[-1])
+        if buffered >= FLUSH or remaining <= 0:
+            counts += np.bincount(np.concatenate(visited), minlength=pages)
+            visited = []
+            buffered = 0
+        if remaining > 0:
+            current = advance(matrix, damping_factor, current, rng)
+    return counts
+
+
+def advance(matrix, damping_factor, current, rng):
+    """
+    Returns the pages the surfers on `current` visit next.
+
+    Each surfer follows one of its page's links, picked uniformly, with
+    probability `damping_factor`, and otherwise jumps to a uniformly
+    random page; surfers on pages without links always jump.
+    """
+    degree = matrix.outdegree[current]
+    follow = (rng.random(len(current)) < damping_factor) & (degree > 0)
+    following = current[follow]
+    picks = rng.integers(degree[follow])
+
+    nxt = rng.integers(len(matrix), size=len(current))
+    nxt[follow] = matrix.targets[matrix.offsets[following] + picks]
+    return nxt
@@ -0,0 +1,94 @@
+import argparse
+import os
+import random
+
+# Average number of links per page
+LINKS = 5
+
+# Share of pages without any links in "dangling" corpora
+DANGLING_SHARE = 0.5
+
+KINDS = ["preferential", "random", "dangling"]
+
+
+def graph(pages, kind, links=LINKS, seed=0):
+    """
+    Returns a corpus dict, as pagerank.crawl would, of `pages` pages
+    with about `links` links each:
+
+    - "preferential": each new page links to earlier pages picked in
+      proportion to the links they already have, plus one, so a few
+      hubs collect most links (Barabasi-Albert).
+    - "random": each page links to pages picked uniformly.
+    - "dangling": as "random", but DANGLING_SHARE of the pages have no
+      links at all.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"unknown kind: {kind}")
+    rng = random.Random(seed)
+    names = [f"{page}.html" for page in range(pages)]
+    corpus = {}
+
+    if kind == "preferential":
+        # Every page once, plus once more per link it received
+        endpoints = []
+        draw = rng.random
+        for page, name in enumerate(names):
+            count = len(endpoints)
+            targets = {
+                endpoints[int(draw() * count)]
+                for _ in range(min(links, page))
+            }
+            corpus[name] = set(map(names.__getitem__, targets))
+            endpoints.extend(targets)
+            endpoints.append(page)
+        return corpus
+
+    for page, name in enumerate(names):
+        if kind == "dangling" and rng.random() < DANGLING_SHARE:
+            corpus[name] = set()
+            continue
+        count = rng.randint(0, 2 * links)
+        targets = {rng.randrange(pages) for _ in range(count)} - {page}
+        corpus[name] = {names[target] for target in targets}
+    return corpus
+
+
+def write(directory, corpus):
+    """
+    Writes each page of `corpus` to `directory` as an HTML file
+    linking to its pages, laid out like the sample corpora.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name, targets in corpus.items():
+        items = "".join(
+            f'            <li><a href="{target}">{target}</a></li>\n'
+            for target in sorted(targets)
+        )
+        with open(os.path.join(directory, name), "w") as f:
+            f.write(
+                "<!DOCTYPE html>\n<html lang=\"en\">\n"
+                f"    <head>\n        <title>{name}</title>\n    </head>\n"
+                f"    <body>\n        <h1>{name}</h1>\n\n"
+                "        <div>Links:</div>\n"
+                f"        <ul>\n{items}        </ul>\n"
+                "    </body>\n</html>\n"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write a synthetic HTML corpus for pagerank.py."
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--kind", choices=KINDS, default="preferential")
+    parser.add_argument("--links", type=int, default=LINKS,
+                        help=f"average links per page (default: {LINKS})")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write(args.directory, graph(args.pages, args.kind, args.links, args.seed))
+
+
+if __name__ == "__main__":
+    main()